@@ -0,0 +1,272 @@
+"""
+Local SQLite cache for Notion data that is reused between runs
+"""
+
+import os
+import time
+import sqlite3
+from typing import Dict, Iterable, Optional, Tuple
+
+# Default cache location, overridable with NOTION_VACATION_CACHE_DIR
+DEFAULT_CACHE_DIR = "~/.cache/notion-vacation-planner"
+CACHE_FILENAME = "cache.db"
+
+# Related page titles rarely change, but refresh them once a day
+CRUISE_TITLE_TTL_SECONDS = 24 * 60 * 60
+
+# Family composition changes rarely, so the People database is re-read once a day
+FAMILY_CONTEXT_TTL_SECONDS = 24 * 60 * 60
+
+# Ship activities are synced incrementally, but fully re-read once a day so deleted ones drop out
+ACTIVITY_FULL_SYNC_TTL_SECONDS = 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed (
+    id TEXT PRIMARY KEY,
+    last_edited_time TEXT NOT NULL,
+    fingerprint TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS memberships (
+    id TEXT PRIMARY KEY,
+    database_id TEXT NOT NULL,
+    location TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cruises (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS family_contexts (
+    database_id TEXT PRIMARY KEY,
+    context TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS activities (
+    database_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    last_edited_time TEXT NOT NULL,
+    PRIMARY KEY (database_id, id)
+);
+CREATE TABLE IF NOT EXISTS activity_syncs (
+    database_id TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ai_outputs (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+);
+"""
+
+_connection: Optional[sqlite3.Connection] = None
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Open the cache database on first use and make sure its tables exist.
+    
+    Returns:
+        Shared SQLite connection
+    """
+    global _connection
+    if _connection is None:
+        # Resolved lazily so a .env file loaded by the caller is respected
+        cache_dir = os.path.expanduser(os.environ.get("NOTION_VACATION_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        _connection = sqlite3.connect(os.path.join(cache_dir, CACHE_FILENAME), check_same_thread=False)
+        _connection.executescript(SCHEMA)
+        # Cache files created before fingerprints were recorded lack the column
+        try:
+            _connection.execute("ALTER TABLE processed ADD COLUMN fingerprint TEXT NOT NULL DEFAULT ''")
+        except sqlite3.OperationalError:
+            pass
+    return _connection
+
+def load_processed_times() -> Dict[str, Tuple[str, str]]:
+    """
+    Load the last_edited_time and content fingerprint of every page as of the program's last full update of it.
+    
+    Returns:
+        Dictionary mapping page IDs to (last_edited_time, fingerprint) pairs
+    """
+    rows = get_connection().execute("SELECT id, last_edited_time, fingerprint FROM processed")
+    return {page_id: (last_edited_time, fingerprint) for page_id, last_edited_time, fingerprint in rows}
+
+def save_processed_times(pages: Iterable[Tuple[str, str, str]]) -> None:
+    """
+    Record fully updated pages in a single transaction.
+    
+    Args:
+        pages: (page ID, last_edited_time after the update, fingerprint of the content it was generated from) tuples
+    """
+    connection = get_connection()
+    with connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO processed (id, last_edited_time, fingerprint) VALUES (?, ?, ?)",
+            pages
+        )
+
+def load_locations(database_id: str) -> Dict[str, str]:
+    """
+    Load the location of every excursion as of the last run that updated recommendations.
+    
+    Args:
+        database_id: ID of the Excursions database
+    
+    Returns:
+        Dictionary mapping page IDs to location names
+    """
+    rows = get_connection().execute("SELECT id, location FROM memberships WHERE database_id = ?", (database_id,))
+    return dict(rows.fetchall())
+
+def save_locations(database_id: str, locations: Dict[str, str]) -> None:
+    """
+    Replace the recorded location of every excursion in a database in a single transaction.
+    
+    Args:
+        database_id: ID of the Excursions database
+        locations: Dictionary mapping page IDs to location names
+    """
+    connection = get_connection()
+    with connection:
+        connection.execute("DELETE FROM memberships WHERE database_id = ?", (database_id,))
+        connection.executemany(
+            "INSERT OR REPLACE INTO memberships (id, database_id, location) VALUES (?, ?, ?)",
+            ((page_id, database_id, location) for page_id, location in locations.items())
+        )
+
+def get_cruise_title(page_id: str) -> Optional[str]:
+    """
+    Look up a cached related page title that has not expired.
+    
+    Args:
+        page_id: ID of the related page
+    
+    Returns:
+        Cached title, or None on a miss
+    """
+    row = get_connection().execute(
+        "SELECT title FROM cruises WHERE id = ? AND fetched_at > ?",
+        (page_id, time.time() - CRUISE_TITLE_TTL_SECONDS)
+    ).fetchone()
+    return row[0] if row else None
+
+def save_cruise_title(page_id: str, title: str) -> None:
+    """
+    Cache the title of a related page.
+    
+    Args:
+        page_id: ID of the related page
+        title: Title of the related page
+    """
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO cruises (id, title, fetched_at) VALUES (?, ?, ?)",
+            (page_id, title, time.time())
+        )
+
+def get_family_context(database_id: str) -> Optional[str]:
+    """
+    Look up a cached family context that has not expired.
+    
+    Args:
+        database_id: ID of the People database the context was built from
+    
+    Returns:
+        Cached family context, or None on a miss
+    """
+    row = get_connection().execute(
+        "SELECT context FROM family_contexts WHERE database_id = ? AND fetched_at > ?",
+        (database_id, time.time() - FAMILY_CONTEXT_TTL_SECONDS)
+    ).fetchone()
+    return row[0] if row else None
+
+def save_family_context(database_id: str, context: str) -> None:
+    """
+    Cache the family context built from a People database.
+    
+    Args:
+        database_id: ID of the People database
+        context: Formatted family context
+    """
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO family_contexts (database_id, context, fetched_at) VALUES (?, ?, ?)",
+            (database_id, context, time.time())
+        )
+
+def load_activities(database_id: str) -> Optional[Dict[str, Tuple[str, str]]]:
+    """
+    Load the cached ship activities of a database, if it was fully synced recently.
+    
+    Args:
+        database_id: ID of the Ship Activities database
+    
+    Returns:
+        Dictionary mapping page IDs to (name, last_edited_time) pairs, or None if
+        the database needs a full sync
+    """
+    connection = get_connection()
+    synced = connection.execute(
+        "SELECT 1 FROM activity_syncs WHERE database_id = ? AND synced_at > ?",
+        (database_id, time.time() - ACTIVITY_FULL_SYNC_TTL_SECONDS)
+    ).fetchone()
+    if synced is None:
+        return None
+    rows = connection.execute(
+        "SELECT id, name, last_edited_time FROM activities WHERE database_id = ?",
+        (database_id,)
+    )
+    return {page_id: (name, last_edited_time) for page_id, name, last_edited_time in rows}
+
+def save_activities(database_id: str, activities: Iterable[Tuple[str, str, str]], full_sync: bool = False) -> None:
+    """
+    Insert or replace ship activities in a single transaction.
+    
+    Args:
+        database_id: ID of the Ship Activities database
+        activities: (page ID, name, last_edited_time) tuples
+        full_sync: Whether the activities are the database's complete contents,
+            replacing everything cached for it
+    """
+    connection = get_connection()
+    with connection:
+        if full_sync:
+            connection.execute("DELETE FROM activities WHERE database_id = ?", (database_id,))
+            connection.execute(
+                "INSERT OR REPLACE INTO activity_syncs (database_id, synced_at) VALUES (?, ?)",
+                (database_id, time.time())
+            )
+        connection.executemany(
+            "INSERT OR REPLACE INTO activities (database_id, id, name, last_edited_time) VALUES (?, ?, ?, ?)",
+            ((database_id, page_id, name, last_edited_time) for page_id, name, last_edited_time in activities)
+        )
+
+def get_ai_output(key: str) -> Optional[str]:
+    """
+    Look up a cached AI response.
+    
+    Args:
+        key: Fingerprint of the request that produced the response
+    
+    Returns:
+        Cached response text, or None on a miss
+    """
+    row = get_connection().execute("SELECT value FROM ai_outputs WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def save_ai_outputs(outputs: Dict[str, str]) -> None:
+    """
+    Cache AI responses in a single transaction.
+    
+    Args:
+        outputs: Dictionary mapping request fingerprints to response text
+    """
+    connection = get_connection()
+    with connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO ai_outputs (key, value, created_at) VALUES (?, ?, ?)",
+            ((key, value, int(time.time())) for key, value in outputs.items())
+        )
@@ -9,17 +9,58 @@ import argparse
 from notion_client import Client
 from dotenv import load_dotenv
 
+# Title property used by both the Excursions and People databases
+NAME_PROPERTY = "Name"
+
+# Maximum page size accepted by the Notion API; fewer round trips per search
+PAGE_SIZE = 100
+
 def extract_text_content(rich_text_list):
     """Extract plain text from a rich text object list."""
     if not rich_text_list:
         return ""
-    return "".join([text.get("plain_text", "") for text in rich_text_list])
+    return "".join(text["plain_text"] for text in rich_text_list)
+
+def find_title_property(properties, property_name=NAME_PROPERTY):
+    """Find the title property, trying the conventional name before scanning."""
+    title_property = properties.get(property_name)
+    if title_property and title_property["type"] == "title":
+        return title_property
+    return next((prop for prop in properties.values() if prop["type"] == "title"), None)
+
+def find_title_property_name(notion, database_id):
+    """Look up the name of a database's title property from its schema."""
+    properties = notion.databases.retrieve(database_id=database_id)["properties"]
+    return next(name for name, prop in properties.items() if prop["type"] == "title")
+
+def iter_database_pages(notion, database_id, query_filter=None):
+    """Yield every page in a Notion database, following pagination cursors."""
+    cursor = None
+    while True:
+        kwargs = {"database_id": database_id, "page_size": PAGE_SIZE}
+        if query_filter:
+            kwargs["filter"] = query_filter
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        query_result = notion.databases.query(**kwargs)
+        
+        # Notion stops paginating past its result limit without setting has_more
+        request_status = query_result.get("request_status", {})
+        if request_status.get("type") == "incomplete":
+            raise RuntimeError(f"Notion query results truncated: {request_status.get('incomplete_reason')}")
+        
+        yield from query_result.get("results", [])
+        if not query_result.get("has_more", False):
+            return
+        cursor = query_result["next_cursor"]
 
 def main():
     parser = argparse.ArgumentParser(description="Find the page ID of a Notion page by its name")
     parser.add_argument("search_term", help="Name (or part of the name) to search for")
     parser.add_argument("--database", choices=["excursions", "people"], default="excursions", 
                         help="Which database to search (default: excursions)")
+    parser.add_argument("--title-property",
+                        help="Name of the database's title property (default: looked up from the database schema)")
     args = parser.parse_args()
     
     # Load environment variables
@@ -53,47 +94,17 @@ def main():
     notion = Client(auth=notion_api_key)
     
     try:
-        # Query the database
-        query_result = notion.databases.query(database_id=database_id)
+        # Let Notion match the search term against the title property, whatever the database calls it
+        title_property_name = args.title_property or find_title_property_name(notion, database_id)
+        query_filter = {"property": title_property_name, "title": {"contains": args.search_term}}
         
-        # Extract pages and their names
-        pages = []
-        for page in query_result.get("results", []):
-            page_id = page.get("id", "")
-            properties = page.get("properties", {})
-            
-            # Find the title property
-            name = "Unknown"
-            for prop_name, prop_value in properties.items():
-                if prop_value.get("type") == "title":
-                    name = extract_text_content(prop_value.get("title", []))
-                    break
+        # Extract matching pages and their names across all result pages
+        matching_pages = []
+        for page in iter_database_pages(notion, database_id, query_filter):
+            title_property = find_title_property(page["properties"], title_property_name)
+            name = extract_text_content(title_property["title"]) if title_property else "Unknown"
             
-            pages.append({"id": page_id, "name": name})
-        
-        # Handle pagination if there are more results
-        while query_result.get("has_more", False):
-            query_result = notion.databases.query(
-                database_id=database_id,
-                start_cursor=query_result["next_cursor"]
-            )
-            
-            for page in query_result.get("results", []):
-                page_id = page.get("id", "")
-                properties = page.get("properties", {})
-                
-                # Find the title property
-                name = "Unknown"
-                for prop_name, prop_value in properties.items():
-                    if prop_value.get("type") == "title":
-                        name = extract_text_content(prop_value.get("title", []))
-                        break
-                
-                pages.append({"id": page_id, "name": name})
-        
-        # Filter pages by search term
-        search_term_lower = args.search_term.lower()
-        matching_pages = [page for page in pages if search_term_lower in page["name"].lower()]
+            matching_pages.append({"id": page["id"], "name": name})
         
         # Display results
         if matching_pages:
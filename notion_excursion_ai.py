@@ -8,15 +8,47 @@ import sys
 import argparse
 import logging
 import re
-from typing import Dict, List, Optional, Any, Tuple
-from collections import defaultdict
-from itertools import combinations
+import json
 import time
+import sqlite3
+import hashlib
+import math
+import operator
+import string
+import random
+import asyncio
+from typing import Dict, List, Optional, Any, Tuple, Iterator, AsyncIterator, Callable
+from functools import lru_cache
+from dataclasses import dataclass
+from itertools import combinations
 
-from openai import OpenAI
-from notion_client import Client
+import httpx
+from httpx import Request, Response
+from openai import OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient
+from notion_client import Client, AsyncClient
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator
+
+# Optional: faster decoding of large Notion query responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: faster HTTP transport for many concurrent OpenAI requests
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Optional: exact token counts when trimming long descriptions
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+import cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,20 +57,228 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Retry policy for transient API failures (rate limits, server errors, timeouts)
+MAX_RETRIES = 5
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Connection pool for the async API clients; idle connections are kept long enough
+# to be reused between the bursts of requests a run makes
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+class FastJSONMixin:
+    """
+    Encode Notion request bodies and decode successful responses with orjson when it is installed.
+    """
+    def _build_request(self, method: str, path: str, query: Optional[Dict[Any, Any]] = None, body: Optional[Dict[Any, Any]] = None, auth: Optional[str] = None) -> Request:
+        if orjson is None or body is None:
+            return super()._build_request(method, path, query, body, auth)
+        headers = httpx.Headers({"Content-Type": "application/json"})
+        if auth:
+            headers["Authorization"] = f"Bearer {auth}"
+        return self.client.build_request(method, path, params=query, content=orjson.dumps(body), headers=headers)
+    
+    def _parse_response(self, response: Response) -> Any:
+        # Error responses keep the SDK's handling so API errors are raised as usual
+        if orjson is None or not response.is_success:
+            return super()._parse_response(response)
+        return orjson.loads(response.content)
+
+class NotionClient(FastJSONMixin, Client):
+    """
+    Synchronous Notion client with fast JSON handling.
+    """
+
+class AsyncNotionClient(FastJSONMixin, AsyncClient):
+    """
+    Asynchronous Notion client with fast JSON handling.
+    """
+
+class AiohttpTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that sends requests through a pooled aiohttp session.
+    
+    httpx's own connection pool slows down as the number of concurrent requests
+    grows, while aiohttp keeps up. Responses are read in full, which is all the
+    non-streaming OpenAI calls made here need, and are decoded by httpx as usual.
+    """
+    def __init__(self, limits: httpx.Limits = HTTP_POOL_LIMITS):
+        self.limits = limits
+        self.session = None
+    
+    async def handle_async_request(self, request: Request) -> Response:
+        # The session is created on first use so it belongs to the running event loop
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.limits.max_connections or 0, keepalive_timeout=self.limits.keepalive_expiry)
+            self.session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+        
+        timeout = request.extensions.get("timeout", {})
+        try:
+            async with self.session.request(
+                request.method,
+                str(request.url),
+                headers=request.headers.multi_items(),
+                data=await request.aread(),
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(sock_connect=timeout.get("connect"), sock_read=timeout.get("read"))
+            ) as response:
+                content = await response.read()
+        except asyncio.TimeoutError as e:
+            raise httpx.ReadTimeout(str(e), request=request) from e
+        except aiohttp.ClientError as e:
+            raise httpx.NetworkError(str(e), request=request) from e
+        
+        return Response(response.status, headers=response.raw_headers, content=content, request=request)
+    
+    async def aclose(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+
+def create_notion_client(api_key: Optional[str]) -> NotionClient:
+    """
+    Create a Notion client backed by a pooled HTTP client.
+    
+    Args:
+        api_key: Notion integration token
+    
+    Returns:
+        Notion client
+    """
+    return NotionClient(auth=api_key, client=httpx.Client(limits=HTTP_POOL_LIMITS))
+
+def create_async_notion_client(api_key: Optional[str]) -> AsyncNotionClient:
+    """
+    Create an async Notion client backed by a pooled HTTP client.
+    
+    The Notion SDK sets its own base URL, headers and timeout on the HTTP
+    client it is given, so it gets a pool of its own rather than sharing one.
+    
+    Args:
+        api_key: Notion integration token
+    
+    Returns:
+        Async Notion client
+    """
+    return AsyncNotionClient(auth=api_key, client=httpx.AsyncClient(limits=HTTP_POOL_LIMITS))
+
+def create_async_openai_client(api_key: Optional[str]) -> AsyncOpenAI:
+    """
+    Create an async OpenAI client backed by a pooled HTTP client.
+    
+    Requests go through aiohttp when it is installed.
+    
+    Args:
+        api_key: OpenAI API key
+    
+    Returns:
+        Async OpenAI client
+    """
+    if aiohttp is not None:
+        http_client = DefaultAsyncHttpxClient(transport=AiohttpTransport(), timeout=HTTP_TIMEOUT)
+    else:
+        http_client = DefaultAsyncHttpxClient(limits=HTTP_POOL_LIMITS, timeout=HTTP_TIMEOUT)
+    return AsyncOpenAI(api_key=api_key, max_retries=MAX_RETRIES, http_client=http_client)
+
 # Initialize API clients
-notion = Client(auth=os.environ.get("NOTION_API_KEY"))
-openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-perplexity_client = OpenAI(api_key=os.environ.get("PERPLEXITY_API_KEY"), base_url="https://api.perplexity.ai")
+notion = create_notion_client(os.environ.get("NOTION_API_KEY"))
+async_notion = create_async_notion_client(os.environ.get("NOTION_API_KEY"))
+openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=MAX_RETRIES)
+async_openai_client = create_async_openai_client(os.environ.get("OPENAI_API_KEY"))
+perplexity_client = OpenAI(api_key=os.environ.get("PERPLEXITY_API_KEY"), base_url="https://api.perplexity.ai", max_retries=MAX_RETRIES)
 
 # Constants
 DATABASE_ID = os.environ.get("NOTION_DATABASE_ID")
 PEOPLE_DATABASE_ID = os.environ.get("NOTION_PEOPLE_DATABASE_ID")  # Add this to your .env file
+CRUISE_DATABASE_ID = os.environ.get("NOTION_CRUISE_DATABASE_ID")  # Optional: overrides the Cruise Schedule database found from the relation
 NAME_PROPERTY = "Name"
 DESCRIPTION_PROPERTY = "Description"
 LOCATION_PROPERTY = "Cruise Details"  # This is a relation field pointing to Cruise Schedule database
 AI_SUMMARY_PROPERTY = "MyAI Summary"
 AI_RECOMMENDATION_PROPERTY = "MyAI Recommendation"
 GUIDE_INSIGHTS_PROPERTY = "Guide Insights"  # New field for travel agent insights
+DESC_HASH_PROPERTY = "MyAI DescHash"  # Optional: hash of the description the AI fields were generated from
+
+# Patterns for picking structured answers out of free-form model output
+JSON_VALUE_START = re.compile(r"[\[{]")  # Where a JSON array or object may begin
+MARKDOWN_JSON_FENCE = re.compile(r"```json\s*")
+MARKDOWN_FENCE = re.compile(r"```\s*")
+LIST_NUMBER = re.compile(r"\d+")
+
+# Ship activity names are compared ignoring case, punctuation and spacing
+ACTIVITY_NAME_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+# Excursions without a description get no AI content, so Notion leaves them out of the query
+HAS_DESCRIPTION_FILTER = {"property": DESCRIPTION_PROPERTY, "rich_text": {"is_not_empty": True}}
+
+# OpenAI models, overridable from the environment or the command line. Summaries and
+# recommendations are short-form tasks for a small model; the larger model is kept
+# for the family-specific guide insights.
+SUMMARY_MODEL = os.environ.get("OPENAI_SUMMARY_MODEL", "gpt-4o-mini")
+RECOMMENDATION_MODEL = os.environ.get("OPENAI_RECOMMENDATION_MODEL", "gpt-4o-mini")
+INSIGHTS_MODEL = os.environ.get("OPENAI_INSIGHTS_MODEL", "gpt-4o")
+
+# Whether cached AI responses may be reused. --force turns this off so every
+# request goes to OpenAI; the fresh responses are still written to the cache.
+REUSE_AI_OUTPUTS = True
+
+# Static system prompts. They lead every request so OpenAI's automatic prompt
+# caching can match the shared prefix across excursions.
+SUMMARY_SYSTEM_PROMPT = "You are a helpful travel assistant providing concise summaries of vacation excursions. Create a 3-sentence summary of each vacation excursion that highlights its key value and appeal. Make it engaging and informative for a family planning their vacation."
+SUMMARIES_SYSTEM_PROMPT = SUMMARY_SYSTEM_PROMPT + """
+
+You will be given a numbered list of excursion descriptions. Return a JSON object that maps each excursion's number in the list (as a string, e.g. "1") to its summary."""
+RECOMMENDATION_ROLE = "You are a helpful travel advisor providing comparative recommendations for vacation excursions. Given the excursion options at a location, provide a brief recommendation (2-3 sentences) for each excursion that compares it to the other options and highlights when that option might be the best choice for a family vacation."
+RECOMMENDATION_SYSTEM_PROMPT = RECOMMENDATION_ROLE + """
+
+Return a JSON object that maps each excursion's number in the list (as a string, e.g. "1") to its recommendation."""
+RECOMMENDATIONS_SYSTEM_PROMPT = RECOMMENDATION_ROLE + """
+
+You will be given the excursions at several numbered locations. Only compare excursions with others at the same location. Return a JSON object that maps each location's number (as a string, e.g. "1") to a JSON object that maps each excursion's number at that location to its recommendation."""
+GUIDE_SYSTEM_PROMPT = "You are an experienced travel agent who specializes in multi-generational family cruise excursions. You have extensive experience with Mediterranean destinations and understand how to balance different age groups' needs and interests."
+
+# When only summaries are updated, this many excursions are summarized per request
+SUMMARY_BATCH_SIZE = 10
+
+# Comparative recommendations for up to this many locations are requested together
+RECOMMENDATION_LOCATIONS_PER_REQUEST = 5
+
+# Descriptions sent for summaries and insights are capped at this many tokens
+MAX_DESCRIPTION_TOKENS = 1500
+DESCRIPTION_ENCODING = "o200k_base"  # Tokenizer used by the gpt-4o model family
+
+# Descriptions are trimmed to this many tokens in comparative recommendation prompts
+RECOMMENDATION_DESCRIPTION_TOKENS = 75
+
+# Ship activity names are compared by embedding; only names in the uncertain band
+# between the two cosine similarity thresholds are checked with a chat completion
+EMBEDDING_MODEL = "text-embedding-3-small"
+SIMILAR_ACTIVITY_THRESHOLD = 0.86
+POSSIBLY_SIMILAR_ACTIVITY_THRESHOLD = 0.72
+
+# Limits of a single embeddings request: number of inputs and total input tokens
+EMBEDDING_BATCH_SIZE = 2048
+EMBEDDING_BATCH_TOKENS = 300000
+
+# How often to check on a submitted OpenAI batch job, in seconds
+BATCH_POLL_INTERVAL = 60
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Maximum page size accepted by the Notion API for database queries
+PAGE_SIZE = 100
+
+# Maximum number of OpenAI requests in flight at once; the SDK retries rate-limited requests
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("OPENAI_MAX_CONCURRENT_REQUESTS", "20"))
+openai_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# OpenAI account rate limits; requests are paced to stay under both
+OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", "500"))
+OPENAI_TOKENS_PER_MINUTE = int(os.environ.get("OPENAI_TOKENS_PER_MINUTE", "200000"))
+
+# Notion allows an average of three requests per second per integration; async
+# requests are paced to that rate, and at most this many page updates are in flight
+NOTION_REQUESTS_PER_SECOND = 3
+MAX_CONCURRENT_NOTION_REQUESTS = 3
+notion_semaphore = asyncio.Semaphore(MAX_CONCURRENT_NOTION_REQUESTS)
 
 # People database properties
 PERSON_NAME_PROPERTY = "Name"
@@ -58,6 +298,350 @@ Family Composition:
 All family members are healthy and capable.
 """
 
+def notion_retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Decide whether a failed Notion request should be retried, and after how long.
+    
+    Args:
+        error: HTTPResponseError or RequestTimeoutError raised by the Notion client
+        attempt: Zero-based number of the attempt that failed
+        
+    Returns:
+        Seconds to wait before retrying, or None if the error should be raised
+    """
+    status = getattr(error, "status", None)
+    if attempt == MAX_RETRIES - 1 or (status is not None and status not in RETRYABLE_STATUS_CODES):
+        return None
+    retry_after = error.headers.get("Retry-After") if status is not None else None
+    delay = None
+    if retry_after:
+        # Retry-After may also be an HTTP date, which falls back to the backoff below
+        try:
+            delay = max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    if delay is None:
+        delay = 2 ** attempt + random.random()
+    logger.warning(f"Notion request failed ({error}), retrying in {delay:.1f}s")
+    return delay
+
+def notion_call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Call a Notion client method, retrying transient failures with exponential backoff.
+    
+    Rate-limited (429), server error (5xx) and timed-out requests are retried up to
+    MAX_RETRIES times, honoring Notion's Retry-After header when present. Any other
+    error is raised immediately.
+    
+    Args:
+        fn: Notion client method to call (e.g. notion.pages.update)
+        *args: Positional arguments for the method
+        **kwargs: Keyword arguments for the method
+        
+    Returns:
+        The method's response
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            return fn(*args, **kwargs)
+        except (HTTPResponseError, RequestTimeoutError) as e:
+            delay = notion_retry_delay(e, attempt)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+async def async_notion_call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Await an async Notion client method with the same retry policy as notion_call.
+    
+    Every attempt is paced by the shared Notion rate limiter.
+    
+    Args:
+        fn: AsyncNotionClient method to call (e.g. async_notion.pages.update)
+        *args: Positional arguments for the method
+        **kwargs: Keyword arguments for the method
+        
+    Returns:
+        The method's response
+    """
+    for attempt in range(MAX_RETRIES):
+        await notion_rate_limiter.acquire()
+        try:
+            return await fn(*args, **kwargs)
+        except (HTTPResponseError, RequestTimeoutError) as e:
+            delay = notion_retry_delay(e, attempt)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+class RateLimiter:
+    """
+    Pace requests to stay under a request budget and, optionally, a token budget per period.
+    
+    Capacity refills continuously over each period, in the style of the OpenAI
+    cookbook's parallel request processor. Waiters are served in order.
+    """
+    def __init__(self, max_requests: int, max_tokens: Optional[int] = None, period: float = 60.0):
+        self.max_requests = max_requests
+        self.max_tokens = max_tokens
+        self.period = period
+        self.available_requests = float(max_requests)
+        self.available_tokens = float(max_tokens or 0)
+        self.last_update = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed_periods = (now - self.last_update) / self.period
+        self.last_update = now
+        self.available_requests = min(self.max_requests, self.available_requests + elapsed_periods * self.max_requests)
+        if self.max_tokens:
+            self.available_tokens = min(self.max_tokens, self.available_tokens + elapsed_periods * self.max_tokens)
+    
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Wait until there is capacity for one request of the given size, then consume it.
+        
+        Args:
+            tokens: Estimated number of tokens the request will use, ignored without a token budget
+        """
+        # A single request larger than the whole budget only has to wait for a full bucket
+        tokens = min(tokens, self.max_tokens) if self.max_tokens else 0
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.available_requests >= 1 and self.available_tokens >= tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+                wait_periods = (1 - self.available_requests) / self.max_requests
+                if tokens:
+                    wait_periods = max(wait_periods, (tokens - self.available_tokens) / self.max_tokens)
+                await asyncio.sleep(wait_periods * self.period)
+    
+    def sync(self, remaining_requests: Optional[int], remaining_tokens: Optional[int]) -> None:
+        """
+        Lower the available capacity to what the API reports as remaining.
+        
+        Keeps pacing accurate when other clients draw on the same quota.
+        
+        Args:
+            remaining_requests: Requests the API reports as remaining, or None if unknown
+            remaining_tokens: Tokens the API reports as remaining, or None if unknown
+        """
+        self._refill()
+        if remaining_requests is not None:
+            self.available_requests = min(self.available_requests, remaining_requests)
+        if remaining_tokens is not None and self.max_tokens:
+            self.available_tokens = min(self.available_tokens, remaining_tokens)
+
+openai_rate_limiter = RateLimiter(OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE)
+notion_rate_limiter = RateLimiter(NOTION_REQUESTS_PER_SECOND, period=1.0)
+
+def header_int(headers: httpx.Headers, name: str) -> Optional[int]:
+    """
+    Read an integer response header.
+    
+    Args:
+        headers: Response headers
+        name: Header name
+        
+    Returns:
+        The header's value, or None if it is missing or not an integer
+    """
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+async def create_chat_completion(**kwargs: Any) -> Any:
+    """
+    Send a chat completion request within the OpenAI concurrency and rate limits.
+    
+    Rate-limited and failed connections are retried with exponential backoff by
+    the OpenAI client itself (max_retries=MAX_RETRIES). The remaining quota
+    reported in each response's rate limit headers is fed back into the limiter.
+    
+    Args:
+        **kwargs: Arguments for chat.completions.create
+        
+    Returns:
+        The chat completion response
+    """
+    # Roughly four characters per token, plus the completion budget
+    estimated_tokens = sum(len(message["content"]) for message in kwargs["messages"]) // 4 + kwargs.get("max_tokens", 0)
+    await openai_rate_limiter.acquire(estimated_tokens)
+    async with openai_semaphore:
+        raw_response = await async_openai_client.chat.completions.with_raw_response.create(**kwargs)
+    
+    # Follow the account's actual remaining quota, which other clients may share
+    openai_rate_limiter.sync(
+        header_int(raw_response.headers, "x-ratelimit-remaining-requests"),
+        header_int(raw_response.headers, "x-ratelimit-remaining-tokens")
+    )
+    return raw_response.parse()
+
+def ai_output_key(request: Dict[str, Any]) -> str:
+    """
+    Fingerprint a chat completion request for the AI output cache.
+    
+    The model, prompts and generation parameters are all part of the key, so
+    changing any of them produces a cache miss.
+    
+    Args:
+        request: Keyword arguments for chat.completions.create
+        
+    Returns:
+        Hex digest identifying the request
+    """
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_ai_output(key: str) -> Optional[str]:
+    """
+    Look up a cached AI response, treating cache errors as a miss.
+    
+    Args:
+        key: Request fingerprint from ai_output_key
+        
+    Returns:
+        Cached response text, or None
+    """
+    if not REUSE_AI_OUTPUTS:
+        return None
+    try:
+        return cache.get_ai_output(key)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read the local AI output cache: {e}")
+        return None
+
+def store_ai_outputs(outputs: Dict[str, str]) -> None:
+    """
+    Cache AI responses, logging rather than failing on cache errors.
+    
+    Args:
+        outputs: Dictionary mapping request fingerprints to response text
+    """
+    if not outputs:
+        return
+    try:
+        cache.save_ai_outputs(outputs)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not update the local AI output cache: {e}")
+
+async def cached_chat_completion(request: Dict[str, Any], parse: Callable[[str], Any] = str.strip) -> Any:
+    """
+    Get the parsed response to a chat completion request, reusing the response to an identical earlier request.
+    
+    Responses are only cached once they parse, so a malformed response is requested again next time.
+    
+    Args:
+        request: Keyword arguments for chat.completions.create
+        parse: Function that turns the response text into the result
+        
+    Returns:
+        The parsed response
+    """
+    key = ai_output_key(request)
+    content = load_ai_output(key)
+    if content is not None:
+        return parse(content)
+    
+    response = await create_chat_completion(**request)
+    content = response.choices[0].message.content
+    result = parse(content)
+    store_ai_outputs({key: content})
+    return result
+
+def check_query_complete(database_id: str, query_result: Dict[str, Any]) -> None:
+    """
+    Make sure a database query response was not truncated by Notion.
+    
+    Notion stops paginating past its result limit without setting has_more,
+    so refuse to hand a partial dataset to the AI processing.
+    
+    Args:
+        database_id: ID of the queried database
+        query_result: Response from databases.query
+        
+    Raises:
+        RuntimeError: If Notion reports that the query results were truncated
+    """
+    request_status = query_result.get("request_status", {})
+    if request_status.get("type") == "incomplete":
+        reason = request_status.get("incomplete_reason")
+        logger.error(f"Notion pagination truncated for database {database_id}: {reason}")
+        raise RuntimeError(f"Notion query results truncated: {reason}")
+
+def iter_database_pages(database_id: str, query_filter: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every page in a Notion database, following pagination cursors.
+    
+    Args:
+        database_id: ID of the database to query
+        query_filter: Optional Notion filter object, applied server-side
+        
+    Yields:
+        Database page objects
+        
+    Raises:
+        RuntimeError: If Notion reports that the query results were truncated
+    """
+    cursor = None
+    while True:
+        kwargs = {"database_id": database_id, "page_size": PAGE_SIZE}
+        if query_filter:
+            kwargs["filter"] = query_filter
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        query_result = notion_call(notion.databases.query, **kwargs)
+        check_query_complete(database_id, query_result)
+        
+        yield from query_result["results"]
+        if not query_result.get("has_more", False):
+            return
+        cursor = query_result["next_cursor"]
+
+async def aiter_database_pages(database_id: str, query_filter: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Asynchronously yield every page in a Notion database as each result page arrives.
+    
+    Queries use the async Notion client so the event loop keeps serving in-flight
+    AI requests while pagination continues. The next result page is requested
+    before the current one is handed out, so the query for page n+1 overlaps
+    with the processing of page n.
+    
+    Args:
+        database_id: ID of the database to query
+        query_filter: Optional Notion filter object, applied server-side
+        
+    Yields:
+        Database page objects
+        
+    Raises:
+        RuntimeError: If Notion reports that the query results were truncated
+    """
+    def query(cursor: Optional[str] = None) -> "asyncio.Task[Dict[str, Any]]":
+        kwargs = {"database_id": database_id, "page_size": PAGE_SIZE}
+        if query_filter:
+            kwargs["filter"] = query_filter
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        return asyncio.create_task(async_notion_call(async_notion.databases.query, **kwargs))
+    
+    pending = query()
+    try:
+        while pending is not None:
+            query_result = await pending
+            check_query_complete(database_id, query_result)
+            
+            pending = query(query_result["next_cursor"]) if query_result.get("has_more", False) else None
+            for page in query_result["results"]:
+                yield page
+    finally:
+        # Don't leave a prefetch running if the caller stops early or a query fails
+        if pending is not None:
+            pending.cancel()
+
 def get_database_pages(database_id: str, page_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Fetch pages from a Notion database.
@@ -71,26 +655,14 @@ def get_database_pages(database_id: str, page_id: Optional[str] = None) -> List[
     """
     if page_id:
         try:
-            page = notion.pages.retrieve(page_id)
+            page = notion_call(notion.pages.retrieve, page_id)
             return [page]
         except Exception as e:
             logger.error(f"Error fetching page {page_id}: {e}")
             return []
     
     try:
-        all_pages = []
-        query_result = notion.databases.query(database_id=database_id)
-        all_pages.extend(query_result["results"])
-        
-        # Handle pagination if there are more results
-        while query_result.get("has_more", False):
-            query_result = notion.databases.query(
-                database_id=database_id,
-                start_cursor=query_result["next_cursor"]
-            )
-            all_pages.extend(query_result["results"])
-        
-        return all_pages
+        return list(iter_database_pages(database_id))
     except Exception as e:
         logger.error(f"Error querying database {database_id}: {e}")
         return []
@@ -108,73 +680,288 @@ def extract_text_content(rich_text_list: List[Dict[str, Any]]) -> str:
     if not rich_text_list:
         return ""
     
-    return "".join([text.get("plain_text", "") for text in rich_text_list])
+    # Most properties hold a single unformatted run, which needs no joining
+    if len(rich_text_list) == 1:
+        return rich_text_list[0]["plain_text"]
+    
+    return "".join([text["plain_text"] for text in rich_text_list])
+
+# Title property names found by scanning; every page of a database shares one, so
+# they are tried by name before scanning again
+discovered_title_properties: List[str] = []
+
+def find_title_property(properties: Dict[str, Any], property_name: str = NAME_PROPERTY) -> Optional[Dict[str, Any]]:
+    """
+    Find the title property of a page.
+    
+    Args:
+        properties: Page properties keyed by property name
+        property_name: Conventional name of the title property
+        
+    Returns:
+        Title property object, or None if the page has no title property
+    """
+    for name in (property_name, *discovered_title_properties):
+        title_property = properties.get(name)
+        if title_property and title_property["type"] == "title":
+            return title_property
+    
+    # Fall back to scanning for databases that name their title column differently
+    for name, prop in properties.items():
+        if prop["type"] == "title":
+            discovered_title_properties.append(name)
+            return prop
+    return None
+
+def extract_page_title(page: Dict[str, Any]) -> Optional[str]:
+    """
+    Extract the title of a page from its title property.
+    
+    Args:
+        page: Notion page object
+        
+    Returns:
+        Title text, or None if the page has no title property
+    """
+    title_property = find_title_property(page["properties"])
+    if title_property is None:
+        return None
+    
+    return extract_text_content(title_property["title"])
 
+@lru_cache(maxsize=None)
 def get_related_page_title(page_id: str) -> str:
     """
     Get the title of a related page.
     
+    Results are memoized for the lifetime of the process, since many excursions
+    share the same related Cruise Details page, and persisted in the local cache
+    between runs. Errors are raised rather than memoized, so a transient failure
+    does not stick to every excursion on the same cruise.
+    
     Args:
         page_id: ID of the related page
         
     Returns:
         Title of the related page
     """
+    cached_title = cache.get_cruise_title(page_id)
+    if cached_title is not None:
+        return cached_title
+    
+    page = notion_call(notion.pages.retrieve, page_id)
+    title = extract_page_title(page)
+    if title is None:
+        return "Unknown Location"
+    
+    cache.save_cruise_title(page_id, title)
+    return title
+
+async def aget_related_page_title(page_id: str) -> str:
+    """
+    Get the title of a related page without blocking the event loop.
+    
+    Args:
+        page_id: ID of the related page
+        
+    Returns:
+        Title of the related page
+    """
+    cached_title = cache.get_cruise_title(page_id)
+    if cached_title is not None:
+        return cached_title
+    
+    page = await async_notion_call(async_notion.pages.retrieve, page_id)
+    title = extract_page_title(page)
+    if title is None:
+        return "Unknown Location"
+    
+    cache.save_cruise_title(page_id, title)
+    return title
+
+def find_cruise_database_id(database_id: str) -> Optional[str]:
+    """
+    Find the Cruise Schedule database, either as configured or from the Excursions database schema.
+    
+    Args:
+        database_id: ID of the Excursions database
+        
+    Returns:
+        ID of the database the Cruise Details relation points to, or None if it cannot be determined
+    """
+    if CRUISE_DATABASE_ID:
+        return CRUISE_DATABASE_ID
+    
     try:
-        page = notion.pages.retrieve(page_id)
-        properties = page.get("properties", {})
+        database = notion_call(notion.databases.retrieve, database_id=database_id)
+        location_property = database["properties"].get(LOCATION_PROPERTY)
+        if location_property and location_property["type"] == "relation":
+            return location_property["relation"]["database_id"]
+    except Exception as e:
+        logger.warning(f"Could not read the schema of database {database_id}: {e}")
+    
+    return None
+
+def fetch_cruise_titles(database_id: str) -> Dict[str, str]:
+    """
+    Fetch the titles of all pages in the Cruise Schedule database in one paginated query.
+    
+    Args:
+        database_id: ID of the Excursions database whose Cruise Details relation is resolved
         
-        # Find the title property (usually "Name" or "Title")
-        for prop_name, prop_value in properties.items():
-            if prop_value.get("type") == "title":
-                return extract_text_content(prop_value.get("title", []))
+    Returns:
+        Dictionary mapping cruise page IDs to their titles (empty if the database cannot be found)
+    """
+    cruise_database_id = find_cruise_database_id(database_id)
+    if not cruise_database_id:
+        return {}
+    
+    title_map = {}
+    for page in get_database_pages(cruise_database_id):
+        title = extract_page_title(page)
+        title_map[page["id"]] = title if title is not None else "Unknown Location"
+    
+    logger.info(f"Loaded {len(title_map)} cruise locations from the Cruise Schedule database")
+    return title_map
+
+@dataclass(slots=True)
+class Excursion:
+    """
+    Fields of an excursion page that the AI content is generated from.
+    """
+    id: str
+    name: str
+    description: str
+    location: str
+    description_hash: Optional[str] = None  # Stored DescHash, or None if the database has no such column
+    location_id: Optional[str] = None  # ID of the related Cruise Details page the location is resolved from
+
+def resolve_location(related_page_id: Optional[str], title_map: Optional[Dict[str, str]] = None) -> str:
+    """
+    Look up the location name of a related Cruise Details page.
+    
+    Args:
+        related_page_id: ID of the related page, or None if the excursion has no location
+        title_map: Optional prefetched mapping of related page IDs to titles
         
-        return "Unknown Location"
+    Returns:
+        Location name, an empty string without a related page, or "Unknown Location" if it cannot be fetched
+    """
+    if not related_page_id:
+        return ""
+    if title_map and related_page_id in title_map:
+        return title_map[related_page_id]
+    # Fetch the title of the related page
+    try:
+        return get_related_page_title(related_page_id)
     except Exception as e:
-        logger.error(f"Error fetching related page {page_id}: {e}")
+        logger.error(f"Error fetching related page {related_page_id}: {e}")
         return "Unknown Location"
 
-def extract_page_data(page: Dict[str, Any]) -> Dict[str, Any]:
+async def aresolve_location(related_page_id: Optional[str], title_map: Dict[str, str]) -> Optional[str]:
+    """
+    Look up the location name of a related Cruise Details page from within the event loop.
+    
+    Titles missing from title_map are fetched asynchronously and added to it, so
+    later excursions on the same cruise do not fetch them again. Failed fetches
+    are not added, so the next excursion on the cruise tries again.
+    
+    Args:
+        related_page_id: ID of the related page, or None if the excursion has no location
+        title_map: Prefetched mapping of related page IDs to titles
+        
+    Returns:
+        Location name, an empty string without a related page, or None if it cannot be fetched
+    """
+    if not related_page_id:
+        return ""
+    if related_page_id not in title_map:
+        try:
+            title_map[related_page_id] = await aget_related_page_title(related_page_id)
+        except Exception as e:
+            logger.error(f"Error fetching related page {related_page_id}: {e}")
+            return None
+    return title_map[related_page_id]
+
+def extract_page_data(page: Dict[str, Any], title_map: Optional[Dict[str, str]] = None, resolve: bool = True) -> Excursion:
     """
     Extract relevant data from a page object.
     
     Args:
         page: Notion page object
+        title_map: Optional prefetched mapping of related page IDs to titles
+        resolve: Whether to look up the location name; if False only location_id is set
         
     Returns:
-        Dictionary with extracted data
+        Excursion record with the extracted data
     """
-    properties = page.get("properties", {})
-    
+    page_id = page.get("id", "")
     name = ""
-    name_property = properties.get(NAME_PROPERTY, {})
-    if name_property.get("type") == "title":
-        name = extract_text_content(name_property.get("title", []))
-    
     description = ""
-    description_property = properties.get(DESCRIPTION_PROPERTY, {})
-    if description_property.get("type") == "rich_text":
-        description = extract_text_content(description_property.get("rich_text", []))
-    
     location = ""
-    location_property = properties.get(LOCATION_PROPERTY, {})
-    
-    # Handle relation property type
-    if location_property.get("type") == "relation":
-        relation_list = location_property.get("relation", [])
-        if relation_list:
-            # Get the first related page ID
-            related_page_id = relation_list[0].get("id")
-            if related_page_id:
-                # Fetch the title of the related page
-                location = get_related_page_title(related_page_id)
+    location_id = None
+    stored_hash = None
     
-    return {
-        "id": page.get("id", ""),
-        "name": name,
-        "description": description,
-        "location": location
-    }
+    try:
+        properties = page["properties"]
+        
+        name_property = find_title_property(properties)
+        if name_property:
+            name = extract_text_content(name_property["title"])
+        
+        description_property = properties.get(DESCRIPTION_PROPERTY)
+        if description_property and description_property["type"] == "rich_text":
+            description = extract_text_content(description_property["rich_text"])
+        
+        # Handle relation property type
+        location_property = properties.get(LOCATION_PROPERTY)
+        if location_property and location_property["type"] == "relation":
+            relation_list = location_property["relation"]
+            if relation_list:
+                # Get the first related page ID
+                location_id = relation_list[0]["id"]
+                if resolve:
+                    location = resolve_location(location_id, title_map)
+        
+        # Only databases that have the hash column take part in change detection
+        hash_property = properties.get(DESC_HASH_PROPERTY)
+        if hash_property and hash_property["type"] == "rich_text":
+            stored_hash = extract_text_content(hash_property["rich_text"])
+    except KeyError as e:
+        logger.error(f"Unexpected structure for page {page_id}, missing key {e}")
+    
+    return Excursion(
+        id=page_id,
+        name=name,
+        description=description,
+        location=location,
+        description_hash=stored_hash,
+        location_id=location_id
+    )
+
+def description_hash(description: str) -> str:
+    """
+    Compute a short, stable fingerprint of an excursion description.
+    
+    Args:
+        description: Excursion description text
+        
+    Returns:
+        Hex digest used to detect description changes between runs
+    """
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()[:16]
+
+def excursion_fingerprint(exc: Excursion) -> str:
+    """
+    Compute a short, stable fingerprint of everything an excursion's AI fields are generated from.
+    
+    Args:
+        exc: Excursion record
+        
+    Returns:
+        Hex digest of the name, location and description, used to detect changes between runs
+    """
+    return description_hash("\0".join((exc.name, exc.location, exc.description)))
 
 def extract_person_data(page: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -213,10 +1000,15 @@ def extract_person_data(page: Dict[str, Any]) -> Dict[str, Any]:
     logger.debug(f"Extracted person data: {response}")
     return response 
 
-def build_family_context() -> str:
+def build_family_context(refresh: bool = False) -> str:
     """
     Build family context from the People database.
     
+    The context is cached locally for a day, since family composition rarely changes.
+    
+    Args:
+        refresh: Re-read the People database even if a cached context is available
+    
     Returns:
         Formatted family context string
     """
@@ -224,6 +1016,16 @@ def build_family_context() -> str:
         logger.warning("NOTION_PEOPLE_DATABASE_ID not set in environment variables. Using default family context.")
         return DEFAULT_FAMILY_CONTEXT
     
+    if not refresh:
+        try:
+            cached_context = cache.get_family_context(PEOPLE_DATABASE_ID)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read the local family context cache: {e}")
+            cached_context = None
+        if cached_context is not None:
+            logger.debug("Using cached family context")
+            return cached_context
+    
     try:
         people_pages = get_database_pages(PEOPLE_DATABASE_ID)
         if not people_pages:
@@ -251,6 +1053,11 @@ def build_family_context() -> str:
         
         context += "\nAll family members are healthy and capable."
         logger.info(f"Family context: {context}")
+        
+        try:
+            cache.save_family_context(PEOPLE_DATABASE_ID, context)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update the local family context cache: {e}")
         return context
         
     except Exception as e:
@@ -258,7 +1065,95 @@ def build_family_context() -> str:
         logger.warning("Using default family context due to error.")
         return DEFAULT_FAMILY_CONTEXT
 
-def generate_ai_summary(description: str) -> str:
+def guide_system_prompt(family_context: str, instructions: str) -> str:
+    """
+    Build the system prompt for requests written from the travel agent's perspective.
+    
+    Everything that is the same for every excursion in a run goes here, ahead of
+    the per-excursion user message, so OpenAI's prompt caching can reuse it.
+    
+    Args:
+        family_context: Dynamic family context from People database
+        instructions: Task-specific instructions
+        
+    Returns:
+        System prompt text
+    """
+    return f"{GUIDE_SYSTEM_PROMPT}\n\nYou are advising this family:\n{family_context}\n\n{instructions}"
+
+@lru_cache(maxsize=None)
+def description_encoding() -> Optional[Any]:
+    """
+    Load the tiktoken encoding used to measure descriptions, once per process.
+    
+    Returns:
+        The encoding, or None if tiktoken is not installed or the encoding cannot be loaded
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(DESCRIPTION_ENCODING)
+    except Exception as e:
+        logger.warning(f"Could not load the {DESCRIPTION_ENCODING} tokenizer, estimating description length instead: {e}")
+        return None
+
+def limit_description_tokens(description: str, max_tokens: int = MAX_DESCRIPTION_TOKENS) -> str:
+    """
+    Cut a description down to a token budget so very long descriptions don't inflate prompts.
+    
+    Args:
+        description: Excursion description text
+        max_tokens: Maximum number of tokens to keep
+        
+    Returns:
+        The original description if it fits, otherwise its first max_tokens tokens
+    """
+    # Every token covers at least one byte, so short descriptions never need tokenizing
+    if len(description.encode()) <= max_tokens:
+        return description
+    
+    encoding = description_encoding()
+    if encoding is None:
+        # Roughly four characters per token, the same estimate the rate limiter uses
+        return description[:max_tokens * 4]
+    
+    tokens = encoding.encode(description)
+    return description if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+def excursion_prompt(description: str, location: str) -> str:
+    """
+    Build the per-excursion user message that follows a shared system prompt.
+    
+    Args:
+        description: Excursion description text
+        location: Location name from the related Cruise Details
+        
+    Returns:
+        User prompt text
+    """
+    return f"Location: {location}\n\nExcursion Description:\n{limit_description_tokens(description)}"
+
+def summary_request(description: str) -> Dict[str, Any]:
+    """
+    Build the chat completion request for an excursion summary.
+    
+    Args:
+        description: Excursion description text
+        
+    Returns:
+        Keyword arguments for chat.completions.create
+    """
+    return {
+        "model": SUMMARY_MODEL,
+        "messages": [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Here's the excursion description:\n\n{limit_description_tokens(description)}"}
+        ],
+        "max_tokens": 150,
+        "temperature": 0.7
+    }
+
+async def generate_ai_summary(description: str) -> Optional[str]:
     """
     Generate a 3-sentence summary of an excursion description using OpenAI.
     
@@ -266,72 +1161,268 @@ def generate_ai_summary(description: str) -> str:
         description: Excursion description text
         
     Returns:
-        AI-generated summary
+        AI-generated summary, or None if it could not be generated
     """
     if not description:
         return "No description available to summarize."
     
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4.5-preview",  # or another appropriate model
-            messages=[
-                {"role": "system", "content": "You are a helpful travel assistant providing concise summaries of vacation excursions."},
-                {"role": "user", "content": f"Create a 3-sentence summary of this vacation excursion that highlights its key value and appeal. Make it engaging and informative for a family planning their vacation. Here's the excursion description:\n\n{description}"}
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-        summary = response.choices[0].message.content.strip()
-        return summary
+        return await cached_chat_completion(summary_request(description))
     except Exception as e:
         logger.error(f"Error generating AI summary: {e}")
-        return "Error generating summary."
+        return None
 
-def generate_recommendations(excursions_by_location: Dict[str, List[Dict[str, Any]]]) -> Dict[str, str]:
+def summaries_request(descriptions: List[str]) -> Dict[str, Any]:
     """
-    Generate relative recommendations for excursions based on location.
+    Build a single JSON-mode chat completion request that summarizes several excursions.
+    
+    Args:
+        descriptions: Excursion description texts
+        
+    Returns:
+        Keyword arguments for chat.completions.create
+    """
+    entries = (f"{i}. {limit_description_tokens(description)}\n\n" for i, description in enumerate(descriptions, 1))
+    return {
+        "model": SUMMARY_MODEL,
+        "messages": [
+            {"role": "system", "content": SUMMARIES_SYSTEM_PROMPT},
+            {"role": "user", "content": "Excursion descriptions:\n\n" + "".join(entries)}
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 150 * len(descriptions),
+        "temperature": 0.7
+    }
+
+def parse_summaries(content: str, count: int) -> List[str]:
+    """
+    Parse the response to a multi-excursion summaries request.
+    
+    Args:
+        content: JSON object mapping list numbers to summaries
+        count: Number of descriptions in the request
+        
+    Returns:
+        Summaries in the order of the request's descriptions
+        
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON
+        KeyError: If a description is missing from the response
+    """
+    summaries_by_number = json.loads(content)
+    return [summaries_by_number[str(i)].strip() for i in range(1, count + 1)]
+
+def summary_output_key(description: str) -> str:
+    """
+    Fingerprint one excursion's summary from a multi-excursion request for the AI output cache.
+    
+    The key covers the request as if the excursion were summarized on its own, so
+    it does not depend on which other excursions share the request or their order.
+    
+    Args:
+        description: Excursion description text
+        
+    Returns:
+        Hex digest identifying the summary
+    """
+    return ai_output_key(summaries_request([description]))
+
+async def generate_ai_summaries(descriptions: List[str]) -> List[Optional[str]]:
+    """
+    Summarize several excursions with one request, saving a request per excursion.
+    
+    Summaries are cached per excursion, so only excursions without a cached
+    summary are sent, however the excursions are grouped.
+    
+    Args:
+        descriptions: Excursion description texts
+        
+    Returns:
+        Summaries in the order of the descriptions, None for any that could not be generated
+    """
+    keys = [summary_output_key(description) for description in descriptions]
+    summaries = [load_ai_output(key) for key in keys]
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if not missing:
+        return summaries
+    
+    missing_descriptions = [descriptions[i] for i in missing]
+    try:
+        response = await create_chat_completion(**summaries_request(missing_descriptions))
+        new_summaries = parse_summaries(response.choices[0].message.content, len(missing))
+        store_ai_outputs({keys[i]: summary for i, summary in zip(missing, new_summaries)})
+    except Exception as e:
+        logger.warning(f"Could not generate {len(missing)} summaries together ({e}), requesting them one at a time")
+        new_summaries = await asyncio.gather(*(generate_ai_summary(description) for description in missing_descriptions))
+    
+    for i, summary in zip(missing, new_summaries):
+        summaries[i] = summary
+    return summaries
+
+def short_description(description: str) -> str:
+    """
+    Trim a description for comparative recommendation prompts.
+    
+    Args:
+        description: Excursion description text
+        
+    Returns:
+        The description if it fits RECOMMENDATION_DESCRIPTION_TOKENS, otherwise its trimmed start followed by "..."
+    """
+    trimmed = limit_description_tokens(description, RECOMMENDATION_DESCRIPTION_TOKENS)
+    return trimmed if trimmed == description else trimmed + "..."
+
+def location_context(location: str, excursions: List[Excursion]) -> str:
+    """
+    Describe all excursions at a location for comparative recommendation prompts.
+    
+    Args:
+        location: Location name
+        excursions: Excursions at the location
+        
+    Returns:
+        Numbered list of excursion names and truncated descriptions
+    """
+    entries = (f"{i}. {excursion.name}: {short_description(excursion.description)}\n\n" for i, excursion in enumerate(excursions, 1))
+    return f"Excursions at {location}:\n\n" + "".join(entries)
+
+def location_recommendations_request(location: str, excursions: List[Excursion]) -> Dict[str, Any]:
+    """
+    Build a single JSON-mode chat completion request for every recommendation at a location.
+    
+    Args:
+        location: Location name
+        excursions: Excursions at the location
+        
+    Returns:
+        Keyword arguments for chat.completions.create
+    """
+    return {
+        "model": RECOMMENDATION_MODEL,
+        "messages": [
+            {"role": "system", "content": RECOMMENDATION_SYSTEM_PROMPT},
+            {"role": "user", "content": location_context(location, excursions)}
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 150 * len(excursions),
+        "temperature": 0.7
+    }
+
+def parse_location_recommendations(content: str, excursions: List[Excursion]) -> Dict[str, str]:
+    """
+    Parse the response to a location recommendations request.
+    
+    Args:
+        content: JSON object mapping excursion list numbers to recommendations
+        excursions: Excursions the recommendations were requested for
+        
+    Returns:
+        Dictionary mapping excursion IDs to recommendation text
+        
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON
+        KeyError: If an excursion is missing from the response
+    """
+    # Numbers rather than names, since excursion names are not guaranteed to be unique
+    recommendations_by_number = json.loads(content)
+    return {excursion.id: recommendations_by_number[str(i)].strip() for i, excursion in enumerate(excursions, 1)}
+
+def recommendation_groups(excursions_by_location: Dict[str, List[Excursion]]) -> List[Dict[str, List[Excursion]]]:
+    """
+    Split locations into groups whose recommendations are generated together.
+    
+    Locations with a single excursion need no request and get a group of their own.
+    
+    Args:
+        excursions_by_location: Dictionary mapping locations to lists of excursions
+        
+    Returns:
+        Groups of locations, each mapping locations to their excursions
+    """
+    groups = [{location: excursions} for location, excursions in excursions_by_location.items() if len(excursions) <= 1]
+    compared = [(location, excursions) for location, excursions in excursions_by_location.items() if len(excursions) > 1]
+    for start in range(0, len(compared), RECOMMENDATION_LOCATIONS_PER_REQUEST):
+        groups.append(dict(compared[start:start + RECOMMENDATION_LOCATIONS_PER_REQUEST]))
+    return groups
+
+def locations_recommendations_request(excursions_by_location: Dict[str, List[Excursion]]) -> Dict[str, Any]:
+    """
+    Build a single JSON-mode chat completion request for every recommendation at several locations.
     
     Args:
         excursions_by_location: Dictionary mapping locations to lists of excursions
         
+    Returns:
+        Keyword arguments for chat.completions.create
+    """
+    context = "\n".join(
+        f"Location {i}. {location_context(location, excursions)}"
+        for i, (location, excursions) in enumerate(excursions_by_location.items(), 1)
+    )
+    return {
+        "model": RECOMMENDATION_MODEL,
+        "messages": [
+            {"role": "system", "content": RECOMMENDATIONS_SYSTEM_PROMPT},
+            {"role": "user", "content": context}
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 150 * sum(len(excursions) for excursions in excursions_by_location.values()),
+        "temperature": 0.7
+    }
+
+def parse_locations_recommendations(content: str, excursions_by_location: Dict[str, List[Excursion]]) -> Dict[str, str]:
+    """
+    Parse the response to a multi-location recommendations request.
+    
+    Args:
+        content: JSON object mapping location numbers to objects mapping excursion list numbers to recommendations
+        excursions_by_location: Locations and excursions the recommendations were requested for
+        
     Returns:
         Dictionary mapping excursion IDs to recommendation text
+        
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON
+        KeyError: If a location or excursion is missing from the response
     """
+    recommendations_by_location = json.loads(content)
     recommendations = {}
+    for i, excursions in enumerate(excursions_by_location.values(), 1):
+        recommendations_by_number = recommendations_by_location[str(i)]
+        for j, excursion in enumerate(excursions, 1):
+            recommendations[excursion.id] = recommendations_by_number[str(j)].strip()
+    return recommendations
+
+async def generate_recommendations(excursions_by_location: Dict[str, List[Excursion]]) -> Dict[str, str]:
+    """
+    Generate relative recommendations for excursions based on location.
+    
+    Locations are grouped with recommendation_groups, and each group of
+    several locations is covered by a single request.
     
-    for location, excursions in excursions_by_location.items():
+    Args:
+        excursions_by_location: Dictionary mapping locations to lists of excursions
+        
+    Returns:
+        Dictionary mapping excursion IDs to recommendation text, leaving out
+        excursions whose recommendation could not be generated
+    """
+    async def recommend_location(location: str, excursions: List[Excursion]) -> Dict[str, str]:
         if len(excursions) <= 1:
             # If only one excursion at this location, no comparisons needed
-            for excursion in excursions:
-                recommendations[excursion["id"]] = f"This is the only excursion option for {location}."
-            continue
+            return {excursion.id: f"This is the only excursion option for {location}." for excursion in excursions}
             
         # For locations with multiple excursions, generate comparative recommendations
         try:
-            # Prepare excursion data for comparison
-            excursion_data = []
-            for excursion in excursions:
-                excursion_data.append({
-                    "id": excursion["id"],
-                    "name": excursion["name"],
-                    "description": excursion["description"][:300] + "..." if len(excursion["description"]) > 300 else excursion["description"]
-                })
-            
-            # Create a contextual description of all excursions at this location
-            context = f"Excursions at {location}:\n\n"
-            for i, exc in enumerate(excursion_data, 1):
-                context += f"{i}. {exc['name']}: {exc['description']}\n\n"
-            
-            # Generate recommendations for each excursion
-            for excursion in excursion_data:
-                prompt = f"""Given the following excursion options at {location}, provide a brief recommendation (2-3 sentences) for the excursion "{excursion['name']}" that compares it to the other options and highlights when this option might be the best choice for a family vacation.
+            async def recommend_excursion(excursion: Excursion) -> str:
+                prompt = f"""Given the following excursion options at {location}, provide a brief recommendation (2-3 sentences) for the excursion "{excursion.name}" that compares it to the other options and highlights when this option might be the best choice for a family vacation.
 
-{context}
+{location_context(location, excursions)}
 
-Recommendation for "{excursion['name']}":"""
+Recommendation for "{excursion.name}":"""
                 
-                response = openai_client.chat.completions.create(
-                    model="gpt-4.5-preview",
+                response = await create_chat_completion(
+                    model=RECOMMENDATION_MODEL,
                     messages=[
                         {"role": "system", "content": "You are a helpful travel advisor providing comparative recommendations for vacation excursions."},
                         {"role": "user", "content": prompt}
@@ -340,20 +1431,71 @@ Recommendation for "{excursion['name']}":"""
                     temperature=0.7
                 )
                 
-                recommendations[excursion["id"]] = response.choices[0].message.content.strip()
-                
-                # Add a small delay to avoid rate limits
-                time.sleep(0.5)
+                return response.choices[0].message.content.strip()
+            
+            # Ask for every recommendation at this location in a single request
+            try:
+                return await cached_chat_completion(
+                    location_recommendations_request(location, excursions),
+                    lambda content: parse_location_recommendations(content, excursions)
+                )
+            except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+                logger.warning(f"Could not parse batched recommendations for {location} ({e}), requesting them one at a time")
+            
+            # Fall back to one request per excursion
+            results = await asyncio.gather(*(recommend_excursion(excursion) for excursion in excursions))
+            return {excursion.id: result for excursion, result in zip(excursions, results)}
                 
         except Exception as e:
             logger.error(f"Error generating recommendations for {location}: {e}")
-            # Provide a fallback recommendation for all excursions at this location
-            for excursion in excursions:
-                recommendations[excursion["id"]] = f"Consider comparing with other options at {location}."
+            # Leave the location out so its recommendations are generated again next run
+            return {}
+    
+    async def recommend_group(group: Dict[str, List[Excursion]]) -> Dict[str, str]:
+        if len(group) > 1:
+            try:
+                return await cached_chat_completion(
+                    locations_recommendations_request(group),
+                    lambda content: parse_locations_recommendations(content, group)
+                )
+            except Exception as e:
+                logger.warning(f"Could not generate recommendations for {len(group)} locations together ({e}), requesting them per location")
+        
+        group_results = await asyncio.gather(*(recommend_location(location, excursions) for location, excursions in group.items()))
+        return {excursion_id: text for result in group_results for excursion_id, text in result.items()}
+    
+    recommendations = {}
+    group_results = await asyncio.gather(*(recommend_group(group) for group in recommendation_groups(excursions_by_location)))
+    for group_recommendations in group_results:
+        recommendations.update(group_recommendations)
     
     return recommendations
 
-def generate_guide_insights(description: str, location: str, family_context: str) -> str:
+def guide_insights_request(description: str, location: str, family_context: str) -> Dict[str, Any]:
+    """
+    Build the chat completion request for travel agent insights.
+    
+    Args:
+        description: Excursion description text
+        location: Location name from the related Cruise Details
+        family_context: Dynamic family context from People database
+        
+    Returns:
+        Keyword arguments for chat.completions.create
+    """
+    instructions = "Drawing on your experience with similar families at the excursion's location, provide 2-3 paragraphs of insights about how the excursion would work for this family, including any tips for maximizing enjoyment for all age groups, potential challenges to consider, and recommendations for family dynamics. Keep the response limited to 2000 characters."
+
+    return {
+        "model": INSIGHTS_MODEL,
+        "messages": [
+            {"role": "system", "content": guide_system_prompt(family_context, instructions)},
+            {"role": "user", "content": excursion_prompt(description, location)}
+        ],
+        "max_tokens": 400,
+        "temperature": 0.7
+    }
+
+async def generate_guide_insights(description: str, location: str, family_context: str) -> Optional[str]:
     """
     Generate travel agent insights for an excursion based on family composition.
     
@@ -363,38 +1505,209 @@ def generate_guide_insights(description: str, location: str, family_context: str
         family_context: Dynamic family context from People database
         
     Returns:
-        Travel agent insights
+        Travel agent insights, or None if they could not be generated
     """
     if not description:
         return "No description available for insights."
     
     try:
-        prompt = f"""As an experienced travel agent who has worked with similar families in {location}, provide 2-3 paragraphs of insights about this excursion, considering the following family composition:
+        return await cached_chat_completion(guide_insights_request(description, location, family_context))
+    except Exception as e:
+        logger.error(f"Error generating guide insights: {e}")
+        return None
 
-{family_context}
+async def generate_excursion_content(
+    description: str,
+    location: str,
+    family_context: str,
+    update_fields: Dict[str, bool]
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Generate the summary and guide insights for an excursion, as requested.
+    
+    The two are requested concurrently, each on its own model.
+    
+    Args:
+        description: Excursion description text
+        location: Location name from the related Cruise Details
+        family_context: Dynamic family context from People database
+        update_fields: Dictionary of fields to update
+        
+    Returns:
+        Summary and guide insights, each None if not requested or could not be generated
+    """
+    summary, guide_insights = None, None
+    if update_fields["summary"] and update_fields["guide_insights"]:
+        summary, guide_insights = await asyncio.gather(
+            generate_ai_summary(description),
+            generate_guide_insights(description, location, family_context)
+        )
+    elif update_fields["summary"]:
+        summary = await generate_ai_summary(description)
+    elif update_fields["guide_insights"]:
+        guide_insights = await generate_guide_insights(description, location, family_context)
+    
+    return summary, guide_insights
 
-Based on the excursion description below, provide specific insights about how this excursion would work for this family, including any tips for maximizing enjoyment for all age groups, potential challenges to consider, and recommendations for family dynamics. Keep the response limited to 2000 characters.
+async def run_batch(requests: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Run chat completion requests as a single OpenAI batch job and wait for it to finish.
+    
+    Batch jobs cost half as much as realtime requests and draw on a separate rate
+    limit pool, but may take up to 24 hours to complete.
+    
+    Args:
+        requests: Dictionary mapping custom IDs to chat.completions.create arguments
+        
+    Returns:
+        Dictionary mapping custom IDs to response text for the requests that succeeded
+    """
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+        for custom_id, body in requests.items()
+    ]
+    input_file = await async_openai_client.files.create(
+        file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+        purpose="batch"
+    )
+    batch = await async_openai_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logger.info(f"Submitted OpenAI batch {batch.id} with {len(requests)} requests")
+    
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+        batch = await async_openai_client.batches.retrieve(batch.id)
+        logger.info(f"OpenAI batch {batch.id} is {batch.status}")
+    
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.error(f"OpenAI batch {batch.id} ended with status {batch.status}")
+        return {}
+    
+    output = await async_openai_client.files.content(batch.output_file_id)
+    results = {}
+    for line in output.text.splitlines():
+        if not line:
+            continue
+        item = json.loads(line)
+        response = item.get("response")
+        if item.get("error") or not response or response["status_code"] != 200:
+            logger.warning(f"Batch request {item['custom_id']} failed: {item.get('error') or response}")
+            continue
+        results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+    
+    return results
 
-Excursion Description:
-{description}"""
+async def generate_content_in_batch(
+    excursions: List[Excursion],
+    excursions_by_location: Dict[str, List[Excursion]],
+    update_fields: Dict[str, bool],
+    family_context: str
+) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+    """
+    Generate all AI content for a bulk update through a single OpenAI batch job.
+    
+    Anything the batch does not return usable results for is generated with
+    realtime requests instead.
+    
+    Args:
+        excursions: Excursions that need a new summary and guide insights
+        excursions_by_location: Locations that need new recommendations, with all of their excursions
+        update_fields: Dictionary of fields to update
+        family_context: Family context for the guide insights
+        
+    Returns:
+        Summaries, recommendations and guide insights, each keyed by excursion ID
+    """
+    requests = {}
+    for exc in excursions:
+        if update_fields["summary"]:
+            requests[f"{exc.id}:summary"] = summary_request(exc.description)
+        if update_fields["guide_insights"]:
+            requests[f"{exc.id}:insights"] = guide_insights_request(exc.description, exc.location, family_context)
+    
+    # Single-excursion locations need no request at all
+    compared_locations = {}
+    realtime_locations = {}
+    for i, (location, location_excursions) in enumerate(excursions_by_location.items()):
+        if len(location_excursions) > 1:
+            compared_locations[f"location-{i}:recommendation"] = (location, location_excursions)
+            requests[f"location-{i}:recommendation"] = location_recommendations_request(location, location_excursions)
+        else:
+            realtime_locations[location] = location_excursions
+    
+    # Only submit requests that have no cached response
+    keys = {custom_id: ai_output_key(request) for custom_id, request in requests.items()}
+    results = {}
+    for custom_id, key in keys.items():
+        cached_output = load_ai_output(key)
+        if cached_output is not None:
+            results[custom_id] = cached_output.strip()
+    
+    batch_results = {}
+    pending = {custom_id: request for custom_id, request in requests.items() if custom_id not in results}
+    if pending:
+        try:
+            batch_results = await run_batch(pending)
+        except Exception as e:
+            logger.error(f"Error running OpenAI batch, falling back to realtime requests: {e}")
+    results.update(batch_results)
+    
+    recommendations = {}
+    for custom_id, (location, location_excursions) in compared_locations.items():
+        try:
+            recommendations.update(parse_location_recommendations(results[custom_id], location_excursions))
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+            realtime_locations[location] = location_excursions
+            batch_results.pop(custom_id, None)
+    
+    summaries = {}
+    insights = {}
+    content_fallbacks = []
+    for exc in excursions:
+        try:
+            if f"{exc.id}:summary" in requests:
+                summaries[exc.id] = results[f"{exc.id}:summary"]
+            if f"{exc.id}:insights" in requests:
+                insights[exc.id] = results[f"{exc.id}:insights"]
+        except KeyError:
+            content_fallbacks.append(exc)
+    store_ai_outputs({keys[custom_id]: output for custom_id, output in batch_results.items()})
+    
+    if content_fallbacks or len(realtime_locations) > len(excursions_by_location) - len(compared_locations):
+        logger.info("Requesting missing batch results in realtime")
+    
+    content_results, realtime_recommendations = await asyncio.gather(
+        asyncio.gather(*(
+            generate_excursion_content(exc.description, exc.location, family_context, update_fields)
+            for exc in content_fallbacks
+        )),
+        generate_recommendations(realtime_locations)
+    )
+    recommendations.update(realtime_recommendations)
+    for exc, (summary, guide_insights) in zip(content_fallbacks, content_results):
+        if summary is not None:
+            summaries[exc.id] = summary
+        if guide_insights is not None:
+            insights[exc.id] = guide_insights
+    
+    return summaries, recommendations, insights
 
-        response = openai_client.chat.completions.create(
-            model="gpt-4.5-preview",
-            messages=[
-                {"role": "system", "content": "You are an experienced travel agent who specializes in multi-generational family cruise excursions. You have extensive experience with Mediterranean destinations and understand how to balance different age groups' needs and interests."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=400,
-            temperature=0.7
-        )
+def rich_text_property(content: str) -> Dict[str, Any]:
+    """
+    Build a rich text property value holding a single plain text run.
+    
+    Args:
+        content: Text to store
         
-        insights = response.choices[0].message.content.strip()
-        return insights
-    except Exception as e:
-        logger.error(f"Error generating guide insights: {e}")
-        return "Error generating travel agent insights."
+    Returns:
+        Property value for a Notion page update
+    """
+    return {"rich_text": [{"type": "text", "text": {"content": content}}]}
 
-def update_notion_page(page_id: str, summary: str = None, recommendation: str = None, guide_insights: str = None) -> bool:
+async def update_notion_page(page_id: str, summary: str = None, recommendation: str = None, guide_insights: str = None, desc_hash: str = None) -> Optional[Dict[str, Any]]:
     """
     Update a Notion page with AI-generated content.
     
@@ -403,73 +1716,79 @@ def update_notion_page(page_id: str, summary: str = None, recommendation: str =
         summary: AI-generated summary (optional)
         recommendation: AI-generated recommendation (optional)
         guide_insights: Travel agent insights (optional)
+        desc_hash: Hash of the description the content was generated from (optional)
         
     Returns:
-        True if update was successful, False otherwise
+        The updated page object, or None if nothing was updated
     """
     try:
-        properties = {}
-        
         # Only include properties that have values
-        if summary is not None:
-            properties[AI_SUMMARY_PROPERTY] = {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": summary
-                        }
-                    }
-                ]
-            }
-        
-        if recommendation is not None:
-            properties[AI_RECOMMENDATION_PROPERTY] = {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": recommendation
-                        }
-                    }
-                ]
-            }
-        
-        if guide_insights is not None:
-            properties[GUIDE_INSIGHTS_PROPERTY] = {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": guide_insights
-                        }
-                    }
-                ]
-            }
+        values = {
+            AI_SUMMARY_PROPERTY: summary,
+            AI_RECOMMENDATION_PROPERTY: recommendation,
+            GUIDE_INSIGHTS_PROPERTY: guide_insights,
+            DESC_HASH_PROPERTY: desc_hash
+        }
+        properties = {name: rich_text_property(value) for name, value in values.items() if value is not None}
         
         # Only update if there are properties to update
         if properties:
-            notion.pages.update(
+            return await async_notion_call(
+                async_notion.pages.update,
                 page_id=page_id,
                 properties=properties
             )
-            return True
         else:
             logger.warning(f"No properties to update for page {page_id}")
-            return False
+            return None
     except Exception as e:
         logger.error(f"Error updating page {page_id}: {e}")
-        return False
+        return None
 
 class PerplexityClient(BaseModel):
-    name: str
-    category: str
-    summary: str
-    activity_description: str
-    insights: str
-    labels: List[str]
+    name: str = "No name provided"
+    category: str = "No category provided"
+    summary: str = "No summary provided"
+    activity_description: str = "No activity_description provided"
+    insights: str = "No insights provided"
+    labels: List[str] = []
     link: Optional[str] = None
 
+    @field_validator("labels", mode="before")
+    @classmethod
+    def split_labels(cls, value: Any) -> Any:
+        # Labels sometimes come back as a single comma-separated string
+        if isinstance(value, str):
+            return [label.strip() for label in value.split(",")]
+        return value
+
+# Validates and fills defaults for a whole list of activities in one pydantic-core call
+SHIP_ACTIVITIES_ADAPTER = TypeAdapter(List[PerplexityClient])
+
+# Structured output schema for the Perplexity ship activities request
+SHIP_ACTIVITIES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "activities": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "category": {"type": "string"},
+                    "summary": {"type": "string"},
+                    "activity_description": {"type": "string"},
+                    "insights": {"type": "string"},
+                    "labels": {"type": "array", "items": {"type": "string"}},
+                    "link": {"type": ["string", "null"]}
+                },
+                "required": ["name", "category", "summary", "activity_description", "insights", "labels"]
+            }
+        }
+    },
+    "required": ["activities"]
+}
+
 def clean_json_string(json_string: str) -> str:
     """
     Clean a JSON string by removing markdown code blocks and extra whitespace.
@@ -481,12 +1800,38 @@ def clean_json_string(json_string: str) -> str:
         A cleaned JSON string ready for parsing
     """
     # Remove markdown code blocks if present
-    json_string = re.sub(r'```json\s*', '', json_string)
-    json_string = re.sub(r'```\s*', '', json_string)
+    json_string = MARKDOWN_JSON_FENCE.sub('', json_string)
+    json_string = MARKDOWN_FENCE.sub('', json_string)
     
     # Strip any leading/trailing whitespace
     return json_string.strip()
 
+def iter_json_values(text: str) -> Iterator[Any]:
+    """
+    Yield the JSON arrays and objects embedded in free text, in a single left-to-right scan.
+    
+    Each candidate opening bracket is parsed with JSONDecoder.raw_decode; a value that
+    parses is skipped over as a whole, and one that doesn't is retried from the next bracket.
+    
+    Args:
+        text: Text that may contain JSON values
+        
+    Yields:
+        Parsed JSON values
+    """
+    decoder = json.JSONDecoder()
+    index = 0
+    while True:
+        match = JSON_VALUE_START.search(text, index)
+        if match is None:
+            return
+        try:
+            value, index = decoder.raw_decode(text, match.start())
+        except json.JSONDecodeError:
+            index = match.start() + 1
+            continue
+        yield value
+
 def get_ship_activities() -> List[Dict[str, Any]]:
     """
     Generate a list of activities available on the Royal Caribbean Explorer of the Seas.
@@ -513,7 +1858,7 @@ def get_ship_activities() -> List[Dict[str, Any]]:
         - labels: Array of labels/tags that apply to this activity (e.g., "Family-Friendly", "Adults Only", "Active", "Relaxing", etc.)
         - link: URL to more information (can be null)
         
-        Return the data as a JSON array of objects, with each object representing one activity.
+        Return the data as a JSON object with an "activities" array, with each object in the array representing one activity.
         Format your response as valid JSON only, with no other text.
         """
         
@@ -531,6 +1876,7 @@ def get_ship_activities() -> List[Dict[str, Any]]:
                     {"role": "system", "content": "You are a helpful assistant that provides structured data about cruise ship activities in valid JSON format only."},
                     {"role": "user", "content": prompt}
                 ],
+                response_format={"type": "json_schema", "json_schema": {"schema": SHIP_ACTIVITIES_SCHEMA}},
                 temperature=0.5,
                 max_tokens=3500
             )
@@ -543,8 +1889,6 @@ def get_ship_activities() -> List[Dict[str, Any]]:
             logger.debug(f"Cleaned JSON content: {content}")
             
             try:
-                import json
-                
                 # Try to parse JSON directly
                 try:
                     # First try to parse as is
@@ -578,59 +1922,30 @@ def get_ship_activities() -> List[Dict[str, Any]]:
                 except json.JSONDecodeError as e:
                     logger.warning(f"JSON decode error: {e}")
                     # Try to extract JSON from the text
-                    import re
+                    values = list(iter_json_values(content))
                     
-                    # Look for a JSON array
-                    json_array_match = re.search(r'\[\s*\{.*?\}\s*\]', content, re.DOTALL)
-                    if json_array_match:
-                        try:
-                            array_text = json_array_match.group(0)
-                            logger.debug(f"Found JSON array: {array_text}")
-                            activities = json.loads(array_text)
-                        except json.JSONDecodeError as e2:
-                            logger.error(f"Failed to parse extracted JSON array: {e2}")
-                            return []
+                    # Prefer a JSON array of activities, otherwise combine individual activity objects
+                    activities = next((value for value in values if isinstance(value, list) and value and isinstance(value[0], dict)), None)
+                    if activities is not None:
+                        logger.debug(f"Found JSON array of {len(activities)} activities")
                     else:
-                        # Look for individual JSON objects and combine them
-                        json_objects = re.findall(r'\{\s*"name".*?\}', content, re.DOTALL)
-                        if json_objects:
-                            try:
-                                activities = []
-                                for obj_text in json_objects:
-                                    activities.append(json.loads(obj_text))
-                                logger.info(f"Extracted {len(activities)} individual JSON objects")
-                            except json.JSONDecodeError as e3:
-                                logger.error(f"Failed to parse individual JSON objects: {e3}")
-                                return []
-                        else:
+                        activities = [value for value in values if isinstance(value, dict) and "name" in value]
+                        if not activities:
                             logger.error("Could not find JSON array or objects in response")
                             return []
+                        logger.info(f"Extracted {len(activities)} individual JSON objects")
                 
-                # Validate and normalize each activity
-                validated_activities = []
-                for activity in activities:
-                    if not isinstance(activity, dict):
-                        logger.warning(f"Skipping invalid activity format: {activity}")
-                        continue
-                    
-                    # Ensure all required fields exist
-                    required_fields = ["name", "category", "summary", "activity_description", "insights"]
-                    for field in required_fields:
-                        if field not in activity:
-                            activity[field] = f"No {field} provided"
-                    
-                    # Ensure link field exists
-                    if "link" not in activity:
-                        activity["link"] = None
-                    
-                    # Ensure labels field exists
-                    if "labels" not in activity:
-                        activity["labels"] = []
-                    elif isinstance(activity["labels"], str):
-                        # If labels is a string, split it into a list
-                        activity["labels"] = [label.strip() for label in activity["labels"].split(",")]
-                    
-                    validated_activities.append(activity)
+                # Validate and normalize all activities in one pass
+                activities = [activity for activity in activities if isinstance(activity, dict)]
+                try:
+                    validated = SHIP_ACTIVITIES_ADAPTER.validate_python(activities)
+                except ValidationError as e:
+                    # Drop the activities that failed and validate the rest
+                    invalid = {error["loc"][0] for error in e.errors()}
+                    logger.warning(f"Skipping {len(invalid)} invalid activities: {e}")
+                    activities = [activity for index, activity in enumerate(activities) if index not in invalid]
+                    validated = SHIP_ACTIVITIES_ADAPTER.validate_python(activities)
+                validated_activities = SHIP_ACTIVITIES_ADAPTER.dump_python(validated)
                 
                 logger.info(f"Successfully generated {len(validated_activities)} ship activities")
                 return validated_activities
@@ -664,29 +1979,22 @@ def get_ship_activities() -> List[Dict[str, Any]]:
         logger.error(f"Error generating ship activities: {e}")
         return []
 
-def check_activity_similarity(new_activity_name: str, existing_activities: List[Dict[str, Any]]) -> Optional[str]:
+def check_activity_similarity(new_activity_name: str, existing_ids: List[str], existing_names: List[str]) -> Optional[str]:
     """
     Check if a new activity name is similar to any existing activities using OpenAI.
     
     Args:
         new_activity_name: Name of the new activity
-        existing_activities: List of existing activity dictionaries
+        existing_ids: Page IDs of the existing activities
+        existing_names: Names of the existing activities, in the same order
         
     Returns:
         Page ID of the similar activity if found, None otherwise
     """
-    if not existing_activities:
+    if not existing_names:
         return None
     
     try:
-        # Create a list of existing activity names
-        existing_names = [activity["properties"]["Name"]["title"][0]["text"]["content"] 
-                          for activity in existing_activities 
-                          if activity.get("properties", {}).get("Name", {}).get("title")]
-        
-        if not existing_names:
-            return None
-            
         # Format the names for the prompt
         existing_names_str = "\n".join([f"{i+1}. {name}" for i, name in enumerate(existing_names)])
         
@@ -723,12 +2031,11 @@ def check_activity_similarity(new_activity_name: str, existing_activities: List[
             return None
         else:
             # Try to extract the number from the response
-            import re
-            match = re.search(r'\d+', similarity_result)
+            match = LIST_NUMBER.search(similarity_result)
             if match:
                 index = int(match.group()) - 1
-                if 0 <= index < len(existing_activities):
-                    return existing_activities[index]["id"]
+                if 0 <= index < len(existing_ids):
+                    return existing_ids[index]
         
         return None
     
@@ -736,7 +2043,180 @@ def check_activity_similarity(new_activity_name: str, existing_activities: List[
         logger.error(f"Error checking activity similarity: {e}")
         return None
 
-def update_existing_activity(page_id: str, activity: Dict[str, Any], database_id: str) -> bool:
+def load_existing_activities(database_id: str) -> List[Tuple[str, str]]:
+    """
+    Get the names of all existing ship activities, keeping the local cache in sync with Notion.
+    
+    When the cache was fully synced within the last day, only activities edited
+    since the newest cached one are queried; otherwise the whole database is read.
+    
+    Args:
+        database_id: ID of the Ship Activities database
+        
+    Returns:
+        (page ID, name) pairs of every named activity
+    """
+    try:
+        cached = cache.load_activities(database_id)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read the local activity cache: {e}")
+        cached = None
+    
+    query_filter = None
+    if cached:
+        # Notion timestamps are rounded to the minute, so re-read the newest minute too
+        newest = max(last_edited_time for _, last_edited_time in cached.values())
+        query_filter = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": newest}}
+    
+    # Untitled pages are cached too, so they are not fetched again on every run
+    fetched = [
+        (page["id"], extract_page_title(page) or "", page["last_edited_time"])
+        for page in iter_database_pages(database_id, query_filter)
+    ]
+    if cached:
+        logger.info(f"Fetched {len(fetched)} ship activities edited since the last sync")
+    
+    try:
+        cache.save_activities(database_id, fetched, full_sync=not cached)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not update the local activity cache: {e}")
+    
+    activities = dict(cached or {})
+    activities.update((page_id, (name, last_edited_time)) for page_id, name, last_edited_time in fetched)
+    return [(page_id, name) for page_id, (name, _) in activities.items() if name]
+
+def normalize_activity_name(name: str) -> str:
+    """
+    Normalize an activity name for matching.
+    
+    Args:
+        name: Activity name
+        
+    Returns:
+        The name lowercased, without punctuation and with single spaces
+    """
+    return " ".join(name.lower().translate(ACTIVITY_NAME_PUNCTUATION).split())
+
+def dot_product(a: List[float], b: List[float]) -> float:
+    """
+    Compute the dot product of two vectors.
+    
+    math.sumprod (Python 3.12+) runs the loop in C; older versions multiply with map.
+    
+    Args:
+        a: First vector
+        b: Second vector, of the same length
+        
+    Returns:
+        Sum of the elementwise products
+    """
+    if hasattr(math, "sumprod"):
+        return math.sumprod(a, b)
+    return sum(map(operator.mul, a, b))
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed texts with as few OpenAI requests as the embeddings endpoint's limits allow.
+    
+    Vectors are scaled to unit length, so the dot product of two is their cosine similarity.
+    
+    Args:
+        texts: Texts to embed
+        
+    Returns:
+        One unit vector per text, in the same order
+    """
+    # Split the texts into requests within the input and token limits. Every token
+    # covers at least one byte, so byte length is a safe upper bound on token count.
+    batches = []
+    batch_tokens = 0
+    for text in texts:
+        text_tokens = len(text.encode())
+        if not batches or len(batches[-1]) == EMBEDDING_BATCH_SIZE or batch_tokens + text_tokens > EMBEDDING_BATCH_TOKENS:
+            batches.append([])
+            batch_tokens = 0
+        batches[-1].append(text)
+        batch_tokens += text_tokens
+    
+    vectors = []
+    for batch in batches:
+        response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=batch)
+        for item in sorted(response.data, key=lambda item: item.index):
+            norm = math.hypot(*item.embedding) or 1.0
+            vectors.append([x / norm for x in item.embedding])
+    return vectors
+
+def find_similar_activity(
+    name: str,
+    name_vector: Optional[List[float]],
+    existing_ids: List[str],
+    existing_names: List[str],
+    existing_vectors: List[List[float]]
+) -> Optional[str]:
+    """
+    Find an existing activity that is likely the same as a new one.
+    
+    Clear matches and clear non-matches are decided by embedding similarity alone;
+    only borderline names, or all names when embeddings are unavailable, are
+    checked with check_activity_similarity.
+    
+    Args:
+        name: Name of the new activity
+        name_vector: Unit embedding of the new name, or None if unavailable
+        existing_ids: Page IDs of the existing activities
+        existing_names: Names of the existing activities, in the same order
+        existing_vectors: Unit embeddings of the existing activity names, in the same order
+        
+    Returns:
+        Page ID of the similar activity if found, None otherwise
+    """
+    if name_vector is None or not existing_vectors:
+        return check_activity_similarity(name, existing_ids, existing_names)
+    
+    similarity, closest = max(
+        ((dot_product(name_vector, vector), page_id) for vector, page_id in zip(existing_vectors, existing_ids)),
+        key=lambda pair: pair[0]
+    )
+    logger.debug(f"Closest existing activity to '{name}' has similarity {similarity:.2f}")
+    
+    if similarity >= SIMILAR_ACTIVITY_THRESHOLD:
+        return closest
+    if similarity >= POSSIBLY_SIMILAR_ACTIVITY_THRESHOLD:
+        return check_activity_similarity(name, existing_ids, existing_names)
+    return None
+
+def activity_properties(activity: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the Ship Activities properties shared by new and updated records.
+    
+    Args:
+        activity: Activity data dictionary
+        
+    Returns:
+        Properties for a Notion page create or update, without the Name
+    """
+    properties = {
+        "Category": {"select": {"name": activity["category"]}},
+        "Summary": rich_text_property(activity["summary"]),
+        "Activity Description": rich_text_property(activity["activity_description"]),
+        "Insights": rich_text_property(activity["insights"]),
+        "Link": {"url": activity.get("link", None)}
+    }
+    
+    # Add Labels as multi-select
+    if "labels" in activity and activity["labels"]:
+        labels = activity["labels"]
+        if isinstance(labels, str):
+            # If labels came as comma-separated string
+            labels = [label.strip() for label in labels.split(",")]
+        
+        properties["Labels"] = {
+            "multi_select": [{"name": label} for label in labels]
+        }
+    
+    return properties
+
+async def update_existing_activity(page_id: str, activity: Dict[str, Any], database_id: str) -> bool:
     """
     Update an existing activity record with new information.
     
@@ -749,61 +2229,15 @@ def update_existing_activity(page_id: str, activity: Dict[str, Any], database_id
         True if update was successful, False otherwise
     """
     try:
-        # Create properties to update
-        properties = {
-            "Category": {
-                "select": {
-                    "name": activity["category"]
-                }
-            },
-            "Summary": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": activity["summary"]
-                        }
-                    }
-                ]
-            },
-            "Activity Description": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": activity["activity_description"]
-                        }
-                    }
-                ]
-            },
-            "Insights": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": activity["insights"]
-                        }
-                    }
-                ]
-            },
-            "Link": {
-                "url": activity.get("link", None)
-            }
-        }
-        
-        # Add Labels as multi-select
-        if "labels" in activity and activity["labels"]:
-            labels = activity["labels"]
-            if isinstance(labels, str):
-                # If labels came as comma-separated string
-                labels = [label.strip() for label in labels.split(",")]
-            
-            properties["Labels"] = {
-                "multi_select": [{"name": label} for label in labels]
-            }
+        properties = activity_properties(activity)
         
         # Update the page
-        notion.pages.update(
-            page_id=page_id,
-            properties=properties
-        )
+        async with notion_semaphore:
+            await async_notion_call(
+                async_notion.pages.update,
+                page_id=page_id,
+                properties=properties
+            )
         
         logger.info(f"Updated existing activity: {activity['name']}")
         return True
@@ -812,7 +2246,37 @@ def update_existing_activity(page_id: str, activity: Dict[str, Any], database_id
         logger.error(f"Error updating activity '{activity['name']}': {e}")
         return False
 
-def create_ship_activity_records(activities: List[Dict[str, Any]], database_id: str) -> int:
+async def create_activity_record(activity: Dict[str, Any], database_id: str) -> bool:
+    """
+    Create a new activity record.
+    
+    Args:
+        activity: Activity data dictionary
+        database_id: The ID of the Notion database
+        
+    Returns:
+        True if creation was successful, False otherwise
+    """
+    try:
+        properties = activity_properties(activity)
+        properties["Name"] = {"title": [{"text": {"content": activity["name"]}}]}
+        
+        # Create the page
+        async with notion_semaphore:
+            await async_notion_call(
+                async_notion.pages.create,
+                parent={"database_id": database_id},
+                properties=properties
+            )
+        
+        logger.info(f"Created new activity: {activity['name']}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error creating activity '{activity['name']}': {e}")
+        return False
+
+async def create_ship_activity_records(activities: List[Dict[str, Any]], database_id: str) -> int:
     """
     Create records in the Ship Activities Notion database for each activity.
     If similar activities already exist, update them instead of creating duplicates.
@@ -829,19 +2293,35 @@ def create_ship_activity_records(activities: List[Dict[str, Any]], database_id:
         return 0
     
     logger.info(f"Processing {len(activities)} ship activity records for Notion")
-    created_or_updated_count = 0
     
     # First, get all existing activities from the database
     try:
-        existing_activities = notion.databases.query(
-            database_id=database_id,
-            page_size=100  # Fetch up to 100 activities
-        )["results"]
+        existing_activities = load_existing_activities(database_id)
         logger.info(f"Found {len(existing_activities)} existing activities in database")
     except Exception as e:
         logger.error(f"Error fetching existing activities: {e}")
         existing_activities = []
     
+    # Only named activities can be matched against; index them by name once
+    existing_ids = [page_id for page_id, _ in existing_activities]
+    existing_titles = [name for _, name in existing_activities]
+    existing_names = set(existing_titles)
+    existing_ids_by_name = {normalize_activity_name(name): page_id for page_id, name in existing_activities}
+    
+    # Embed every existing and new activity name up front, one request each
+    existing_vectors = []
+    name_vectors = {}
+    try:
+        existing_vectors = embed_texts(existing_titles)
+        new_names = [activity["name"] for activity in activities if isinstance(activity, dict) and activity.get("name")]
+        name_vectors = dict(zip(new_names, embed_texts(new_names)))
+    except Exception as e:
+        logger.warning(f"Could not embed activity names ({e}), checking similarity with chat completions only")
+    
+    # Decide what to write for each activity first; later duplicates in this batch
+    # replace earlier ones, so no two concurrent writes target the same page
+    updates = {}
+    creates = {}
     for activity in activities:
         try:
             # Validate activity format
@@ -870,106 +2350,48 @@ def create_ship_activity_records(activities: List[Dict[str, Any]], database_id:
                     # Skip this activity if we can't create a valid record
                     continue
             
-            # Check if activity already exists by exact name
-            query_results = notion.databases.query(
-                database_id=database_id,
-                filter={
-                    "property": "Name",
-                    "title": {
-                        "equals": activity["name"]
-                    }
-                }
-            )
-            
-            # If exact match found, skip it
-            if query_results["results"]:
+            # If an activity with exactly this name exists, skip it
+            if activity["name"] in existing_names:
                 logger.info(f"Activity '{activity['name']}' already exists with exact name, skipping")
                 continue
             
-            # Check for similar activities
-            similar_page_id = check_activity_similarity(activity["name"], existing_activities)
+            # A near-identical name earlier in this batch is updated rather than created twice
+            normalized_name = normalize_activity_name(activity["name"])
+            if normalized_name in creates:
+                creates[normalized_name] = {**activity, "name": creates[normalized_name]["name"]}
+                continue
+            
+            # Check for similar activities, starting with names that only differ in case or punctuation
+            similar_page_id = existing_ids_by_name.get(normalized_name)
+            if similar_page_id is None:
+                similar_page_id = find_similar_activity(
+                    activity["name"],
+                    name_vectors.get(activity["name"]),
+                    existing_ids,
+                    existing_titles,
+                    existing_vectors
+                )
             
             if similar_page_id:
                 # Update the existing similar activity
                 logger.info(f"Found similar activity for '{activity['name']}', updating existing record")
-                if update_existing_activity(similar_page_id, activity, database_id):
-                    created_or_updated_count += 1
+                updates[similar_page_id] = activity
                 continue
             
             # No similar activity found, create a new one
-            # Create properties for the new page
-            properties = {
-                "Name": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": activity["name"]
-                            }
-                        }
-                    ]
-                },
-                "Category": {
-                    "select": {
-                        "name": activity["category"]
-                    }
-                },
-                "Summary": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": activity["summary"]
-                            }
-                        }
-                    ]
-                },
-                "Activity Description": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": activity["activity_description"]
-                            }
-                        }
-                    ]
-                },
-                "Insights": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": activity["insights"]
-                            }
-                        }
-                    ]
-                },
-                "Link": {
-                    "url": activity.get("link", None)
-                }
-            }
-            
-            # Add Labels as multi-select
-            if "labels" in activity and activity["labels"]:
-                labels = activity["labels"]
-                if isinstance(labels, str):
-                    # If labels came as comma-separated string
-                    labels = [label.strip() for label in labels.split(",")]
-                
-                properties["Labels"] = {
-                    "multi_select": [{"name": label} for label in labels]
-                }
-            
-            # Create the page
-            notion.pages.create(
-                parent={"database_id": database_id},
-                properties=properties
-            )
-            
-            created_or_updated_count += 1
-            logger.info(f"Created new activity: {activity['name']}")
+            existing_names.add(activity["name"])
+            creates[normalized_name] = activity
             
         except Exception as e:
             activity_name = activity.get("name", str(activity)) if isinstance(activity, dict) else str(activity)
             logger.error(f"Error processing activity '{activity_name}': {e}")
     
-    return created_or_updated_count
+    # Write all records concurrently, paced by the Notion semaphore and rate limiter
+    results = await asyncio.gather(
+        *(update_existing_activity(page_id, activity, database_id) for page_id, activity in updates.items()),
+        *(create_activity_record(activity, database_id) for activity in creates.values())
+    )
+    return sum(results)
 
 def setup_argument_parser() -> argparse.ArgumentParser:
     """
@@ -993,6 +2415,27 @@ def setup_argument_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--update-all", action="store_true", help="Update all AI-generated fields"
     )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Regenerate AI fields for every excursion, bypassing cached AI responses"
+    )
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="Generate AI content through the OpenAI Batch API (half price, may take up to 24 hours)"
+    )
+    parser.add_argument(
+        "--summary-model", metavar="MODEL", help="OpenAI model for summaries (overrides OPENAI_SUMMARY_MODEL)"
+    )
+    parser.add_argument(
+        "--recommendation-model", metavar="MODEL", help="OpenAI model for recommendations (overrides OPENAI_RECOMMENDATION_MODEL)"
+    )
+    parser.add_argument(
+        "--insights-model", metavar="MODEL", help="OpenAI model for guide insights (overrides OPENAI_INSIGHTS_MODEL)"
+    )
+    parser.add_argument(
+        "--refresh-family", action="store_true",
+        help="Re-read the People database instead of using the cached family context"
+    )
     parser.add_argument(
         "--debug", action="store_true", help="Enable debug logging"
     )
@@ -1012,6 +2455,7 @@ def load_environment() -> Dict[str, str]:
         "NOTION_API_KEY": os.getenv("NOTION_API_KEY"),
         "DATABASE_ID": os.getenv("NOTION_DATABASE_ID"),
         "PEOPLE_DATABASE_ID": os.getenv("NOTION_PEOPLE_DATABASE_ID"),
+        "CRUISE_DATABASE_ID": os.getenv("NOTION_CRUISE_DATABASE_ID"),
         "SHIP_ACTIVITIES_DATABASE_ID": os.getenv("NOTION_SHIP_ACTIVITIES_DATABASE_ID"),
         "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
         "PERPLEXITY_API_KEY": os.getenv("PERPLEXITY_API_KEY")
@@ -1029,22 +2473,23 @@ def load_environment() -> Dict[str, str]:
         
     return env_vars
 
-def initialize_clients(notion_api_key: str, openai_api_key: str) -> Tuple[Client, OpenAI, Optional[OpenAI]]:
+def initialize_clients(notion_api_key: str, openai_api_key: str, perplexity_api_key: Optional[str] = None) -> Tuple[NotionClient, AsyncNotionClient, OpenAI, AsyncOpenAI, Optional[OpenAI]]:
     """
-    Initialize and return the Notion, OpenAI, and Perplexity API clients.
+    Initialize and return the Notion (sync and async), OpenAI (sync and async), and Perplexity API clients.
     """
-    notion_client = Client(auth=notion_api_key)
-    openai_client_instance = OpenAI(api_key=openai_api_key) if openai_api_key else None
+    notion_client = create_notion_client(notion_api_key)
+    async_notion_client = create_async_notion_client(notion_api_key)
+    openai_client_instance = OpenAI(api_key=openai_api_key, max_retries=MAX_RETRIES) if openai_api_key else None
+    async_openai_client_instance = create_async_openai_client(openai_api_key) if openai_api_key else None
     
     # Initialize Perplexity client if API key is available
-    perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
     perplexity_client_instance = None
     if perplexity_api_key:
-        perplexity_client_instance = OpenAI(api_key=perplexity_api_key, base_url="https://api.perplexity.ai")
+        perplexity_client_instance = OpenAI(api_key=perplexity_api_key, base_url="https://api.perplexity.ai", max_retries=MAX_RETRIES)
     
-    return notion_client, openai_client_instance, perplexity_client_instance
+    return notion_client, async_notion_client, openai_client_instance, async_openai_client_instance, perplexity_client_instance
 
-def process_ship_activities(ship_activities_db_id: str) -> None:
+async def process_ship_activities(ship_activities_db_id: str) -> None:
     """
     Process ship activities and create records in Notion.
     """
@@ -1055,7 +2500,7 @@ def process_ship_activities(ship_activities_db_id: str) -> None:
     # Gather ship activities and create records
     activities = get_ship_activities()
     if activities:
-        created_count = create_ship_activity_records(activities, ship_activities_db_id)
+        created_count = await create_ship_activity_records(activities, ship_activities_db_id)
         logger.info(f"Successfully created {created_count} ship activity records in Notion")
     else:
         logger.error("Failed to gather ship activities")
@@ -1076,42 +2521,37 @@ def determine_update_fields(args) -> Dict[str, bool]:
         
     return update_fields
 
-def process_single_page(page_id: str, update_fields: Dict[str, bool]) -> None:
+async def process_single_page(page_id: str, update_fields: Dict[str, bool], refresh_family: bool = False) -> None:
     """
     Process a single Notion page by ID.
     """
     try:
         # Get the page data
-        page = notion.pages.retrieve(page_id=page_id)
+        page = notion_call(notion.pages.retrieve, page_id=page_id)
         page_data = extract_page_data(page)
         
-        if page_data["description"]:
+        if page_data.description:
             # Build family context only if we're updating the guide insights
             family_context = ""
             if update_fields["guide_insights"]:
-                family_context = build_family_context()
+                family_context = build_family_context(refresh=refresh_family)
             
             # Generate AI content based on which fields to update
-            summary = None
-            if update_fields["summary"]:
-                summary = generate_ai_summary(page_data["description"])
+            summary, guide_insights = await generate_excursion_content(
+                page_data.description,
+                page_data.location,
+                family_context,
+                update_fields
+            )
             
             recommendation = None
             if update_fields["recommendation"]:
                 # For single pages, we use a simplified recommendation
-                recommendation = f"This is one of several options in {page_data['location']}. " \
+                recommendation = f"This is one of several options in {page_data.location}. " \
                                  f"Consider your preferences and schedule when deciding."
             
-            guide_insights = None
-            if update_fields["guide_insights"]:
-                guide_insights = generate_guide_insights(
-                    page_data["description"],
-                    page_data["location"],
-                    family_context
-                )
-            
             # Update the page
-            update_notion_page(
+            await update_notion_page(
                 page_id,
                 summary=summary,
                 recommendation=recommendation,
@@ -1125,79 +2565,290 @@ def process_single_page(page_id: str, update_fields: Dict[str, bool]) -> None:
         if logger.level == logging.DEBUG:
             logger.exception("Detailed error:")
 
-def process_all_pages(database_id: str, update_fields: Dict[str, bool]) -> None:
+async def process_all_pages(database_id: str, update_fields: Dict[str, bool], force: bool = False, batch: bool = False, refresh_family: bool = False) -> None:
     """
     Process all pages in the Notion database.
+    
+    Excursions whose fingerprint (name, location and description) matches the stored
+    MyAI DescHash, or whose page has not been edited since this program last filled
+    in every AI field, are skipped unless force is set. Recommendations are
+    regenerated for every excursion at a location where any excursion changed, was
+    added, moved in or out, or removed. With batch set, all AI content is
+    generated through the OpenAI Batch API instead of realtime requests.
     """
-    # Get all pages from the database
-    pages = get_database_pages(database_id)
+    # Resolve all location titles up front instead of one request per excursion
+    title_map = fetch_cruise_titles(database_id)
+    
+    # Build family context only if we're updating the guide insights
+    family_context = ""
+    if update_fields["guide_insights"]:
+        family_context = build_family_context(refresh=refresh_family)
+    
+    # The hash is only recorded once every AI field has been generated from the description
+    update_all_fields = all(update_fields.values())
     
-    # Extract data from each page
+    # Pages are fully processed as of the last_edited_time recorded after the program's own update.
+    # last_edited_time only has minute precision, so the fingerprint of the name, location and
+    # description is recorded too, catching edits made in the same minute and renamed locations.
+    try:
+        processed_times = cache.load_processed_times()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read the local processed page cache: {e}")
+        processed_times = {}
+    newly_processed = []
+    
+    # Locations as of the last run that updated recommendations, to notice excursions moving or disappearing
+    previous_locations = {}
+    if update_fields["recommendation"]:
+        try:
+            previous_locations = cache.load_locations(database_id)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read the local location cache: {e}")
+    
+    # Stream pages from the database, starting AI generation for each excursion as soon as its page arrives
     excursions_data = []
-    for page in pages:
-        page_data = extract_page_data(page)
-        excursions_data.append(page_data)
+    all_by_location = {}
+    current_hashes = {}
+    content_tasks = {}
+    
+    # Excursions with identical AI inputs (stock copy reused across sailings) share one generation
+    content_owners = {}
+    shared_content = {}
+    
+    # Excursions skipped because their location could not be looked up
+    unresolved = set()
+    
+    # Summaries are sent several excursions per request
+    summarize_in_chunks = not batch and update_fields["summary"]
+    summary_chunk = []
+    summary_tasks = []
+    insights_tasks = {}
+    
+    async def chunk_summary(summaries_task: "asyncio.Task[List[str]]", index: int, excursion_id: str) -> Tuple[Optional[str], Optional[str]]:
+        insights_task = insights_tasks.get(excursion_id)
+        guide_insights = await insights_task if insights_task else None
+        return (await summaries_task)[index], guide_insights
+    
+    def start_summary_chunk(chunk: List[Excursion]) -> None:
+        summaries_task = asyncio.create_task(generate_ai_summaries([exc.description for exc in chunk]))
+        summary_tasks.append(summaries_task)
+        for index, exc in enumerate(chunk):
+            content_tasks[exc.id] = asyncio.create_task(chunk_summary(summaries_task, index, exc.id))
+    
+    try:
+        async for page in aiter_database_pages(database_id, query_filter=HAS_DESCRIPTION_FILTER):
+            # Extracting from the payload at hand is cheap, and last_edited_time is too coarse to
+            # tell whether a previously extracted record is still current
+            exc = extract_page_data(page, resolve=False)
+            # Resolved separately so a title_map miss does not block the event loop
+            location = await aresolve_location(exc.location_id, title_map)
+            if location is None:
+                # Generating content for the wrong location would stick, so leave the excursion for a later run
+                logger.warning(f"Skipping {exc.name} for now, its location could not be looked up")
+                unresolved.add(exc.id)
+                continue
+            exc.location = location
+            excursions_data.append(exc)
+            all_by_location.setdefault(exc.location, []).append(exc)
+            if not exc.description:
+                continue
+            current_hash = excursion_fingerprint(exc)
+            if not force and processed_times.get(exc.id) == (page["last_edited_time"], current_hash):
+                continue
+            if not force and exc.description_hash == current_hash:
+                continue
+            current_hashes[exc.id] = current_hash
+            # Guide insights also depend on the location, summaries only on the description
+            content_hash = description_hash(exc.description)
+            input_key = (content_hash, exc.location) if update_fields["guide_insights"] else content_hash
+            owner = content_owners.setdefault(input_key, exc.id)
+            if owner != exc.id:
+                shared_content[exc.id] = owner
+                continue
+            if summarize_in_chunks:
+                # Guide insights on their own model start right away, the summary once its chunk is full
+                if update_fields["guide_insights"]:
+                    insights_tasks[exc.id] = asyncio.create_task(
+                        generate_guide_insights(exc.description, exc.location, family_context)
+                    )
+                summary_chunk.append(exc)
+                if len(summary_chunk) == SUMMARY_BATCH_SIZE:
+                    start_summary_chunk(summary_chunk)
+                    summary_chunk = []
+            elif not batch and (update_fields["summary"] or update_fields["guide_insights"]):
+                content_tasks[exc.id] = asyncio.create_task(
+                    generate_excursion_content(exc.description, exc.location, family_context, update_fields)
+                )
+    except Exception as e:
+        logger.error(f"Error querying database {database_id}: {e}")
+        for task in [*content_tasks.values(), *summary_tasks, *insights_tasks.values()]:
+            task.cancel()
+        return
+    
+    if summary_chunk:
+        start_summary_chunk(summary_chunk)
     
     # Log the number of excursions found
-    logger.info(f"Found {len(excursions_data)} excursions in the database")
+    logger.info(f"Found {len(excursions_data)} excursions in the database, {len(current_hashes)} new or changed")
+    if shared_content:
+        logger.info(f"{len(shared_content)} changed excursions share AI content with an identical excursion")
     
-    # Build family context only if we're updating the guide insights
-    family_context = ""
-    if update_fields["guide_insights"]:
-        family_context = build_family_context()
+    # Any change at a location invalidates the comparative recommendations of all its excursions
+    changed_locations = {exc.location for exc in excursions_data if exc.id in current_hashes}
     
-    # Group excursions by location
-    excursions_by_location = {}
-    for exc in excursions_data:
-        location = exc["location"]
-        if location not in excursions_by_location:
-            excursions_by_location[location] = []
-        excursions_by_location[location].append(exc)
+    # So does an excursion moving to another location or leaving the database
+    current_locations = {exc.id: exc.location for exc in excursions_data}
+    # Skipped excursions are assumed to have stayed put until their location can be looked up again
+    current_locations.update((page_id, previous_locations[page_id]) for page_id in unresolved if page_id in previous_locations)
+    for page_id, previous_location in previous_locations.items():
+        location = current_locations.get(page_id)
+        if location != previous_location:
+            changed_locations.add(previous_location)
+            if location is not None:
+                changed_locations.add(location)
     
-    # Generate recommendations for each location if needed
-    recommendations = {}
+    # Recommendations need every excursion at a location, so they start once pagination is done
+    excursions_by_location = {}
     if update_fields["recommendation"]:
-        recommendations = generate_recommendations(excursions_by_location)
+        # Affected locations that still have excursions, in a stable, sorted order
+        excursions_by_location = {
+            location: all_by_location[location] for location in sorted(changed_locations) if location in all_by_location
+        }
     
-    # Process each excursion
-    for exc in excursions_data:
+    if batch:
+        summaries, recommendations, insights = await generate_content_in_batch(
+            [exc for exc in excursions_data if exc.id in current_hashes and exc.id not in shared_content],
+            excursions_by_location,
+            update_fields,
+            family_context
+        )
+        
+        async def excursion_content(exc: Excursion) -> Tuple[Optional[str], Optional[str]]:
+            owner_id = shared_content.get(exc.id, exc.id)
+            return summaries.get(owner_id), insights.get(owner_id)
+        
+        async def location_recommendations(location: str) -> Dict[str, str]:
+            return recommendations
+    else:
+        # One task per group of locations, so each excursion can be written as soon as its own group is done
+        recommendation_tasks = {}
+        for group in recommendation_groups(excursions_by_location):
+            group_task = asyncio.create_task(generate_recommendations(group))
+            for location in group:
+                recommendation_tasks[location] = group_task
+        
+        async def excursion_content(exc: Excursion) -> Tuple[Optional[str], Optional[str]]:
+            owner_id = shared_content.get(exc.id, exc.id)
+            if owner_id not in content_tasks:
+                return None, None
+            return await content_tasks[owner_id]
+        
+        async def location_recommendations(location: str) -> Dict[str, str]:
+            if location not in recommendation_tasks:
+                return {}
+            return await recommendation_tasks[location]
+    
+    async def write_excursion(exc: Excursion) -> bool:
         try:
-            if not exc["description"]:
-                logger.warning(f"No description found for {exc['name']}")
-                continue
-            
-            # Generate AI content based on which fields to update
-            summary = None
-            if update_fields["summary"]:
-                summary = generate_ai_summary(exc["description"])
+            # Wait only for this excursion's own AI content
+            summary, guide_insights = await excursion_content(exc)
             
             recommendation = None
             if update_fields["recommendation"]:
-                location = exc["location"]
-                exc_id = exc["id"]
-                if location in recommendations and exc_id in recommendations[location]:
-                    recommendation = recommendations[location][exc_id]
+                recommendation = (await location_recommendations(exc.location)).get(exc.id)
             
-            guide_insights = None
-            if update_fields["guide_insights"]:
-                guide_insights = generate_guide_insights(
-                    exc["description"],
-                    exc["location"],
-                    family_context
+            # Fields that could not be generated are None; only a page with every
+            # requested field generated is up to date
+            expected = [recommendation] if update_fields["recommendation"] else []
+            if exc.id in current_hashes:
+                expected += [value for field, value in (("summary", summary), ("guide_insights", guide_insights)) if update_fields[field]]
+            complete = None not in expected
+            
+            desc_hash = None
+            if complete and exc.id in current_hashes and update_all_fields and exc.description_hash is not None:
+                desc_hash = current_hashes[exc.id]
+            
+            async with notion_semaphore:
+                updated_page = await update_notion_page(
+                    exc.id,
+                    summary=summary,
+                    recommendation=recommendation,
+                    guide_insights=guide_insights,
+                    desc_hash=desc_hash
                 )
+            if updated_page is None:
+                return False
+            if recommendation is not None:
+                recommendations_written.add(exc.id)
             
-            # Update the Notion page
-            update_notion_page(
-                exc["id"],
-                summary=summary,
-                recommendation=recommendation,
-                guide_insights=guide_insights
-            )
-        
+            # Only a run over every field, all of them generated, leaves the page fully up to date
+            if complete and update_all_fields and "last_edited_time" in updated_page:
+                newly_processed.append((exc.id, updated_page["last_edited_time"], excursion_fingerprint(exc)))
+            # Pages written with fields missing are not counted as updated
+            return complete
         except Exception as e:
-            logger.error(f"Error processing excursion {exc['name']}: {e}")
+            logger.error(f"Error processing excursion {exc.name}: {e}")
             if logger.level == logging.DEBUG:
                 logger.exception("Detailed error:")
+            return False
+    
+    # Decide which excursions need writing back
+    updates = []
+    for exc in excursions_data:
+        if not exc.description:
+            logger.warning(f"No description found for {exc.name}")
+            continue
+        
+        changed = exc.id in current_hashes
+        if not changed and not (update_fields["recommendation"] and exc.location in changed_locations):
+            logger.debug(f"Description unchanged for {exc.name}, skipping")
+            continue
+        
+        updates.append(exc)
+    
+    # Write each excursion back to Notion as soon as its content is ready
+    recommendations_written = set()
+    results = await asyncio.gather(*(write_excursion(exc) for exc in updates))
+    
+    # Pages at locations whose recommendations were not all written keep their previous
+    # location, so the move that invalidated the location is noticed again next run
+    failed_locations = {exc.location for exc in updates if exc.id not in recommendations_written}
+    saved_locations = {}
+    for page_id in current_locations.keys() | previous_locations.keys():
+        location = current_locations.get(page_id)
+        previous_location = previous_locations.get(page_id)
+        if location in failed_locations or previous_location in failed_locations:
+            location = previous_location
+        if location is not None:
+            saved_locations[page_id] = location
+    
+    try:
+        cache.save_processed_times(newly_processed)
+        if update_fields["recommendation"]:
+            cache.save_locations(database_id, saved_locations)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not update the local processed page cache: {e}")
+    logger.info(f"Updated {sum(results)} of {len(updates)} excursions in Notion")
+
+async def close_async_clients() -> None:
+    """
+    Close the connection pools of the async API clients.
+    """
+    await async_notion.aclose()
+    if async_openai_client:
+        await async_openai_client.close()
+
+async def run_and_close(coro: Any) -> None:
+    """
+    Run a coroutine, then close the async clients' connection pools on the same event loop.
+    
+    Args:
+        coro: Coroutine to run
+    """
+    try:
+        await coro
+    finally:
+        await close_async_clients()
 
 def main() -> None:
     """
@@ -1216,12 +2867,14 @@ def main() -> None:
     env_vars = load_environment()
     
     # Initialize global API clients
-    global notion, openai_client, perplexity_client
-    notion, openai_client, perplexity_client = initialize_clients(env_vars["NOTION_API_KEY"], env_vars["OPENAI_API_KEY"])
+    global notion, async_notion, openai_client, async_openai_client, perplexity_client
+    notion, async_notion, openai_client, async_openai_client, perplexity_client = initialize_clients(
+        env_vars["NOTION_API_KEY"], env_vars["OPENAI_API_KEY"], env_vars["PERPLEXITY_API_KEY"]
+    )
 
     # Special mode: gather ship activities
     if args.gather_ship_activities:
-        process_ship_activities(env_vars["SHIP_ACTIVITIES_DATABASE_ID"])
+        asyncio.run(run_and_close(process_ship_activities(env_vars["SHIP_ACTIVITIES_DATABASE_ID"])))
         sys.exit(0)
 
     # For regular excursion processing, DATABASE_ID is required
@@ -1230,19 +2883,31 @@ def main() -> None:
         sys.exit(1)
 
     # Set global variables for backward compatibility
-    global DATABASE_ID, PEOPLE_DATABASE_ID, SHIP_ACTIVITIES_DATABASE_ID
+    global DATABASE_ID, PEOPLE_DATABASE_ID, CRUISE_DATABASE_ID, SHIP_ACTIVITIES_DATABASE_ID
     DATABASE_ID = env_vars["DATABASE_ID"]
     PEOPLE_DATABASE_ID = env_vars["PEOPLE_DATABASE_ID"]
+    CRUISE_DATABASE_ID = env_vars["CRUISE_DATABASE_ID"]
     SHIP_ACTIVITIES_DATABASE_ID = env_vars["SHIP_ACTIVITIES_DATABASE_ID"]
 
+    # Command-line model choices take precedence over the environment
+    global SUMMARY_MODEL, RECOMMENDATION_MODEL, INSIGHTS_MODEL
+    SUMMARY_MODEL = args.summary_model or SUMMARY_MODEL
+    RECOMMENDATION_MODEL = args.recommendation_model or RECOMMENDATION_MODEL
+    INSIGHTS_MODEL = args.insights_model or INSIGHTS_MODEL
+
+    global REUSE_AI_OUTPUTS
+    REUSE_AI_OUTPUTS = not args.force
+
     # Determine which fields to update
     update_fields = determine_update_fields(args)
     
     # Process specific page or all pages
     if args.page_id:
-        process_single_page(args.page_id, update_fields)
+        if args.batch:
+            logger.info("--batch only applies to full database runs, using realtime requests")
+        asyncio.run(run_and_close(process_single_page(args.page_id, update_fields, refresh_family=args.refresh_family)))
     else:
-        process_all_pages(env_vars["DATABASE_ID"], update_fields)
+        asyncio.run(run_and_close(process_all_pages(env_vars["DATABASE_ID"], update_fields, force=args.force, batch=args.batch, refresh_family=args.refresh_family)))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
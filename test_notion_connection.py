@@ -5,6 +5,8 @@ Test script to verify Notion API connection
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from notion_client import Client
 from dotenv import load_dotenv
 
@@ -39,31 +41,38 @@ def extract_text_content(rich_text_list):
         return ""
     return "".join([text.get("plain_text", "") for text in rich_text_list])
 
+@lru_cache(maxsize=None)
+def fetch_related_page_title(notion_client, page_id):
+    """Fetch the title of a related page once; errors are raised, so they are not cached."""
+    page = notion_client.pages.retrieve(page_id)
+    properties = page.get("properties", {})
+    
+    # Find the title property
+    for prop_name, prop_value in properties.items():
+        if prop_value.get("type") == "title":
+            return extract_text_content(prop_value.get("title", []))
+    
+    return f"[Untitled Page: {page_id}]"
+
 def get_related_page_title(notion_client, page_id):
-    """Get the title of a related page."""
+    """Get the title of a related page, fetching each page only once."""
     try:
-        page = notion_client.pages.retrieve(page_id)
-        properties = page.get("properties", {})
-        
-        # Find the title property
-        for prop_name, prop_value in properties.items():
-            if prop_value.get("type") == "title":
-                return extract_text_content(prop_value.get("title", []))
-        
-        return f"[Untitled Page: {page_id}]"
+        return fetch_related_page_title(notion_client, page_id)
     except Exception as e:
         return f"[Error: {str(e)}]"
 
 def test_database_connection(notion_client, database_id, database_name):
     """Test connection to a specific database and print its properties."""
     try:
-        # Try to query the database
-        query_result = notion_client.databases.query(database_id=database_id)
+        # Query the database and get its schema at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            query_future = executor.submit(notion_client.databases.query, database_id=database_id)
+            schema_future = executor.submit(notion_client.databases.retrieve, database_id=database_id)
+            query_result = query_future.result()
+            db_info = schema_future.result()
         print(f"\n✅ Successfully accessed {database_name} database!")
         print(f"Database contains {len(query_result.get('results', []))} records.")
         
-        # Get database schema
-        db_info = notion_client.databases.retrieve(database_id=database_id)
         db_properties = db_info.get("properties", {})
         print(f"\n{database_name} Database Properties:")
         for prop_name, prop_info in db_properties.items():
@@ -73,6 +82,20 @@ def test_database_connection(notion_client, database_id, database_name):
         # Print the first few records to verify content
         results = query_result.get('results', [])
         if results:
+            # Fetch the titles of every related page shown below at the same time
+            related_ids = {
+                rel.get("id")
+                for page in results[:3]
+                for prop_value in page.get("properties", {}).values()
+                if prop_value.get("type") == "relation"
+                for rel in prop_value.get("relation", [])[:2]  # Limit to first 2 relations
+            }
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                related_titles_by_id = dict(zip(
+                    related_ids,
+                    executor.map(lambda rel_id: get_related_page_title(notion_client, rel_id), related_ids)
+                ))
+            
             print(f"\nSample {database_name} records:")
             for i, page in enumerate(results[:3], 1):
                 page_id = page.get("id", "Unknown ID")
@@ -105,9 +128,7 @@ def test_database_connection(notion_client, database_id, database_name):
                     elif prop_type == "relation":
                         relation_ids = [rel.get("id") for rel in prop_value.get("relation", [])]
                         if relation_ids:
-                            related_titles = []
-                            for rel_id in relation_ids[:2]:  # Limit to first 2 relations
-                                related_titles.append(get_related_page_title(notion_client, rel_id))
+                            related_titles = [related_titles_by_id[rel_id] for rel_id in relation_ids[:2]]
                             value_display = ", ".join(related_titles)
                             if len(relation_ids) > 2:
                                 value_display += f" (+ {len(relation_ids) - 2} more)"
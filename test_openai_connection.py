@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 Test script to verify OpenAI API connection
+
+Run with --verbose to also list some of the models available to your account.
 """
 
 import os
@@ -43,15 +45,16 @@ try:
     print(f"\n✅ Successfully connected to OpenAI API!")
     print(f"Response: \"{message}\"")
     
-    # Print available models (optional)
-    print("\nChecking available models...")
-    models = client.models.list()
-    print(f"Found {len(models.data)} models available to your account.")
-    
-    # Print a few model IDs
-    print("Some available models:")
-    for model in models.data[:5]:  # Show first 5 models
-        print(f"- {model.id}")
+    # Print available models (optional, an extra request with a large response)
+    if "--verbose" in sys.argv:
+        print("\nChecking available models...")
+        models = client.models.list()
+        print(f"Found {len(models.data)} models available to your account.")
+        
+        # Print a few model IDs
+        print("Some available models:")
+        for model in models.data[:5]:  # Show first 5 models
+            print(f"- {model.id}")
     
 except Exception as e:
     print(f"\n❌ Error connecting to OpenAI API: {e}")